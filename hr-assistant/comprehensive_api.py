@@ -137,7 +137,7 @@ class ComprehensiveHRAPI:
             # Use RAG for response
             logger.info(f"💬 Processing chat with RAG: '{request.message}'")
             
-            rag_response = self.rag_system.answer_query(
+            rag_response = await self.rag_system.answer_query(
                 query=request.message,
                 max_sources=request.max_sources,
                 include_sources=True
@@ -277,7 +277,7 @@ async def rag_ask(query: RAGQuery):
             )
         
         # Process query through RAG system
-        response = api_system.rag_system.answer_query(
+        response = await api_system.rag_system.answer_query(
             query=query.query,
             max_sources=query.max_sources,
             include_sources=query.include_sources,
@@ -394,7 +394,7 @@ async def websocket_chat(websocket: WebSocket):
 async def vector_search(query: str, top_k: int = 5, title_filter: Optional[str] = None):
     """Search documents using vector similarity."""
     try:
-        documents = api_system.rag_system.retrieve_relevant_documents(query, top_k)
+        documents = await api_system.rag_system.retrieve_relevant_documents(query, top_k)
         return {
             "query": query,
             "results": documents,
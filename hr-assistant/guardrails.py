@@ -6,17 +6,64 @@ Implements security, privacy, content filtering, and compliance controls
 
 import re
 import logging
+from bisect import bisect_right
+from itertools import accumulate
 import hashlib
+import threading
 import time
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
+
+# Optional RE2 for matching a whole rule list in a single pass
+try:
+    import re2
+    RE2_AVAILABLE = hasattr(re2, "Set")
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Optional Aho-Corasick automaton for the confidential keyword list
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQL injection patterns
+SQL_PATTERNS = [
+    r'(\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC)\b)',
+    r'(\b(UNION|OR|AND)\s+\d+\s*=\s*\d+)',
+    r'(\'|\";|--|\#)'
+]
+
+# Script injection patterns
+SCRIPT_PATTERNS = [
+    r'<script[^>]*>.*?</script>',
+    r'javascript:',
+    r'onload\s*=',
+    r'eval\s*\(',
+]
+
+# Sensitive HR topics that trigger the response disclaimer
+SENSITIVE_TOPICS = (
+    'salary', 'compensation', 'disciplinary', 'termination',
+    'legal', 'lawsuit', 'discrimination', 'harassment',
+    'medical', 'disability', 'mental health'
+)
+_SENSITIVE_TOPIC_RE = re.compile("|".join(map(re.escape, SENSITIVE_TOPICS)))
+
+# Disclaimer appended to responses that touch a sensitive topic
+HR_DISCLAIMER = ("\n\n⚠️ **Disclaimer**: This information is for general guidance only. "
+                 "For specific situations involving compensation, disciplinary actions, "
+                 "legal matters, or personal circumstances, please consult with HR directly "
+                 "or seek appropriate professional advice.")
+
 class RiskLevel(Enum):
     """Risk assessment levels for queries and responses"""
     LOW = "low"
@@ -33,6 +80,39 @@ class ViolationType(Enum):
     RATE_LIMIT = "rate_limit"
     COMPLIANCE_VIOLATION = "compliance_violation"
 
+class PatternSet:
+    """
+    A list of compiled regexes that can report which of them match a text.
+    
+    With RE2 installed all patterns are compiled into one set and matched in a
+    single scan of the text; otherwise each pattern is searched in turn.
+    """
+    
+    def __init__(self, patterns: List[re.Pattern]):
+        self.patterns = patterns
+        self._set = None
+        
+        if RE2_AVAILABLE:
+            try:
+                pattern_set = re2.Set.SearchSet()
+                for pattern in patterns:
+                    flags = "(?i)" if pattern.flags & re.IGNORECASE else ""
+                    pattern_set.Add(flags + pattern.pattern)
+                pattern_set.Compile()
+                self._set = pattern_set
+            except Exception as e:
+                logger.warning(f"RE2 pattern set unavailable, using re: {e}")
+    
+    def __iter__(self):
+        return iter(self.patterns)
+    
+    def matching(self, text: str) -> List[re.Pattern]:
+        """Return the patterns that match somewhere in text, in their original order"""
+        # RE2's \d and \b are ASCII-only, so non-ASCII text keeps re's Unicode semantics
+        if self._set is not None and text.isascii():
+            return [self.patterns[i] for i in sorted(self._set.Match(text) or ())]
+        return [pattern for pattern in self.patterns if pattern.search(text)]
+
 @dataclass
 class GuardrailViolation:
     """Represents a guardrail violation"""
@@ -44,6 +124,71 @@ class GuardrailViolation:
     user_id: Optional[str] = None
     query: Optional[str] = None
 
+class ViolationStats:
+    """
+    Columnar record of violations (timestamp, type, risk level, user) kept in a
+    growable NumPy structured array so summaries are vectorised array scans.
+    """
+    
+    DTYPE = np.dtype([('ts', 'f8'), ('type', 'i1'), ('risk', 'i1'), ('user', 'i4')])
+    TYPES = tuple(ViolationType)
+    RISKS = tuple(RiskLevel)
+    
+    def __init__(self, capacity: int = 1024):
+        self._rows = np.empty(capacity, dtype=self.DTYPE)
+        self._size = 0
+        self._user_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._type_codes = {vtype: code for code, vtype in enumerate(self.TYPES)}
+        self._risk_codes = {risk: code for code, risk in enumerate(self.RISKS)}
+    
+    def __len__(self):
+        return self._size
+    
+    def add(self, violation: GuardrailViolation):
+        """Append one violation, doubling the backing array when it is full"""
+        with self._lock:
+            if self._size == len(self._rows):
+                rows = np.empty(2 * len(self._rows), dtype=self.DTYPE)
+                rows[:self._size] = self._rows[:self._size]
+                self._rows = rows
+            user = -1
+            if violation.user_id:
+                user = self._user_ids.setdefault(violation.user_id, len(self._user_ids))
+            self._rows[self._size] = (violation.timestamp.timestamp(),
+                                      self._type_codes[violation.violation_type],
+                                      self._risk_codes[violation.risk_level],
+                                      user)
+            self._size += 1
+    
+    def summary(self, since: datetime) -> Dict[str, Any]:
+        """Count violations after since by type, risk level and unique user"""
+        with self._lock:
+            rows = self._rows[:self._size]
+            recent = rows[rows['ts'] > since.timestamp()]
+        users = recent['user']
+        return {
+            'total_violations': len(recent),
+            'by_type': self._count(recent['type'], self.TYPES),
+            'by_risk_level': self._count(recent['risk'], self.RISKS),
+            'unique_users': len(np.unique(users[users >= 0])),
+        }
+    
+    def prune(self, before: datetime):
+        """Drop violations recorded at or before the given time"""
+        with self._lock:
+            rows = self._rows[:self._size]
+            kept = rows[rows['ts'] > before.timestamp()]
+            self._rows[:len(kept)] = kept
+            self._size = len(kept)
+    
+    @staticmethod
+    def _count(codes: np.ndarray, members: Tuple[Enum, ...]) -> Dict[str, int]:
+        """Count codes with bincount, keyed by enum value in order of first occurrence"""
+        counts = np.bincount(codes, minlength=len(members))
+        present, first = np.unique(codes, return_index=True)
+        return {members[present[i]].value: int(counts[present[i]]) for i in np.argsort(first)}
+
 class HRGuardrails:
     """
     Comprehensive guardrails system for HR Assistant
@@ -52,12 +197,20 @@ class HRGuardrails:
     
     def __init__(self):
         self.violations_log = []
+        self.violation_stats = ViolationStats()
         self.rate_limit_cache = {}
+        # Guards violations_log and rate_limit_cache; validation may run in worker threads
+        self._lock = threading.Lock()
         self.blocked_patterns = self._load_blocked_patterns()
         self.pii_patterns = self._load_pii_patterns()
         self.confidential_keywords = self._load_confidential_keywords()
+        self._confidential_lower = [keyword.lower() for keyword in self.confidential_keywords]
+        self._confidential_re = re.compile("|".join(map(re.escape, self._confidential_lower)))
+        self._confidential_automaton = self._build_keyword_automaton(self._confidential_lower)
+        self.sql_patterns = PatternSet([re.compile(p, re.IGNORECASE) for p in SQL_PATTERNS])
+        self.script_patterns = PatternSet([re.compile(p, re.IGNORECASE) for p in SCRIPT_PATTERNS])
         
-    def _load_blocked_patterns(self) -> List[re.Pattern]:
+    def _load_blocked_patterns(self) -> PatternSet:
         """Load patterns for inappropriate content detection"""
         patterns = [
             # Profanity and inappropriate language
@@ -71,9 +224,9 @@ class HRGuardrails:
             # System manipulation attempts
             r'\b(ignore\s+instructions|forget\s+previous|system\s+prompt)\b',
         ]
-        return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        return PatternSet([re.compile(pattern, re.IGNORECASE) for pattern in patterns])
     
-    def _load_pii_patterns(self) -> List[re.Pattern]:
+    def _load_pii_patterns(self) -> PatternSet:
         """Load patterns for PII detection"""
         patterns = [
             # Social Security Numbers
@@ -93,7 +246,7 @@ class HRGuardrails:
             # Address patterns
             r'\b\d+\s+[A-Za-z\s]+\s+(Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln)\b',
         ]
-        return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        return PatternSet([re.compile(pattern, re.IGNORECASE) for pattern in patterns])
     
     def _load_confidential_keywords(self) -> List[str]:
         """Load keywords that indicate confidential information"""
@@ -108,6 +261,17 @@ class HRGuardrails:
             'discrimination', 'harassment', 'complaint', 'grievance'
         ]
     
+    def _build_keyword_automaton(self, keywords: List[str]):
+        """Build an Aho-Corasick automaton over the keywords, or None without pyahocorasick"""
+        if not AHOCORASICK_AVAILABLE:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword in set(keywords):
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+    
     def validate_query(self, query: str, user_id: Optional[str] = None) -> Tuple[bool, List[GuardrailViolation]]:
         """
         Validate a user query against all guardrails
@@ -140,8 +304,10 @@ class HRGuardrails:
         violations.extend(security_violations)
         
         # Log violations
+        with self._lock:
+            self.violations_log.extend(violations)
         for violation in violations:
-            self.violations_log.append(violation)
+            self.violation_stats.add(violation)
             logger.warning(f"Guardrail violation: {violation.violation_type.value} - {violation.message}")
         
         # Determine if query is allowed
@@ -155,6 +321,34 @@ class HRGuardrails:
         Validate and potentially modify a response before sending to user
         Returns (filtered_response, violations)
         """
+        return self._validate_response(response)
+    
+    def validate_response_many(self, responses: List[str], query: str = "", user_id: Optional[str] = None) -> List[Tuple[str, List[GuardrailViolation]]]:
+        """
+        Validate a batch of responses, with the same results as validate_response on each
+        The keyword and sensitive-topic alternations are scanned once over the whole batch
+        (joined with a separator) and hits are mapped back to responses by offset; responses
+        without a hit skip those checks.
+        Returns [(filtered_response, violations), ...]
+        """
+        lowered = [response.lower() for response in responses]
+        joined = "\x1f".join(lowered)
+        starts = list(accumulate((len(text) + 1 for text in lowered[:-1]), initial=0))
+        
+        def hit_indices(pattern: re.Pattern) -> set:
+            return {bisect_right(starts, m.start()) - 1 for m in pattern.finditer(joined)}
+        
+        confidential = hit_indices(self._confidential_re)
+        sensitive = hit_indices(_SENSITIVE_TOPIC_RE)
+        
+        return [
+            self._validate_response(response, i in confidential, i in sensitive)
+            for i, response in enumerate(responses)
+        ]
+    
+    def _validate_response(self, response: str, may_be_confidential: bool = True,
+                           may_be_sensitive: bool = True) -> Tuple[str, List[GuardrailViolation]]:
+        """Run the response checks; the flags let a batch skip scans it has ruled out"""
         violations = []
         filtered_response = response
         
@@ -162,21 +356,24 @@ class HRGuardrails:
         filtered_response, pii_violations = self._sanitize_pii_in_response(filtered_response)
         violations.extend(pii_violations)
         
-        # Confidential information check
-        conf_violations = self._check_confidential_info(filtered_response)
-        violations.extend(conf_violations)
+        # Confidential information check (PII redaction can only remove keyword hits)
+        if may_be_confidential:
+            conf_violations = self._check_confidential_info(filtered_response)
+            violations.extend(conf_violations)
         
         # Content appropriateness
         content_violations = self._check_response_content(filtered_response)
         violations.extend(content_violations)
         
         # Add disclaimer for sensitive topics
-        if self._contains_sensitive_topic(filtered_response):
+        if may_be_sensitive and self._contains_sensitive_topic(filtered_response):
             filtered_response = self._add_hr_disclaimer(filtered_response)
         
         # Log violations
+        with self._lock:
+            self.violations_log.extend(violations)
         for violation in violations:
-            self.violations_log.append(violation)
+            self.violation_stats.add(violation)
             logger.warning(f"Response violation: {violation.violation_type.value} - {violation.message}")
         
         return filtered_response, violations
@@ -189,37 +386,37 @@ class HRGuardrails:
         current_time = datetime.now()
         window_start = current_time - timedelta(minutes=window_minutes)
         
-        # Clean old entries
-        if user_id in self.rate_limit_cache:
-            self.rate_limit_cache[user_id] = [
-                timestamp for timestamp in self.rate_limit_cache[user_id]
-                if timestamp > window_start
-            ]
-        else:
-            self.rate_limit_cache[user_id] = []
-        
-        # Check if limit exceeded
-        if len(self.rate_limit_cache[user_id]) >= max_requests:
-            return False
-        
-        # Add current request
-        self.rate_limit_cache[user_id].append(current_time)
-        return True
+        with self._lock:
+            # Clean old entries
+            if user_id in self.rate_limit_cache:
+                self.rate_limit_cache[user_id] = [
+                    timestamp for timestamp in self.rate_limit_cache[user_id]
+                    if timestamp > window_start
+                ]
+            else:
+                self.rate_limit_cache[user_id] = []
+            
+            # Check if limit exceeded
+            if len(self.rate_limit_cache[user_id]) >= max_requests:
+                return False
+            
+            # Add current request
+            self.rate_limit_cache[user_id].append(current_time)
+            return True
     
     def _check_content_filter(self, text: str) -> List[GuardrailViolation]:
         """Check for inappropriate content"""
         violations = []
         
-        for pattern in self.blocked_patterns:
-            if pattern.search(text):
-                violations.append(GuardrailViolation(
-                    violation_type=ViolationType.INAPPROPRIATE_CONTENT,
-                    risk_level=RiskLevel.HIGH,
-                    message="Inappropriate content detected",
-                    details=f"Content contains blocked pattern: {pattern.pattern}",
-                    timestamp=datetime.now(),
-                    query=text[:100] + "..." if len(text) > 100 else text
-                ))
+        for pattern in self.blocked_patterns.matching(text):
+            violations.append(GuardrailViolation(
+                violation_type=ViolationType.INAPPROPRIATE_CONTENT,
+                risk_level=RiskLevel.HIGH,
+                message="Inappropriate content detected",
+                details=f"Content contains blocked pattern: {pattern.pattern}",
+                timestamp=datetime.now(),
+                query=text[:100] + "..." if len(text) > 100 else text
+            ))
         
         return violations
     
@@ -227,7 +424,7 @@ class HRGuardrails:
         """Check for PII in user input"""
         violations = []
         
-        for pattern in self.pii_patterns:
+        for pattern in self.pii_patterns.matching(text):
             matches = pattern.findall(text)
             if matches:
                 violations.append(GuardrailViolation(
@@ -246,41 +443,26 @@ class HRGuardrails:
         violations = []
         
         # SQL injection patterns
-        sql_patterns = [
-            r'(\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC)\b)',
-            r'(\b(UNION|OR|AND)\s+\d+\s*=\s*\d+)',
-            r'(\'|\";|--|\#)'
-        ]
-        
-        for pattern in sql_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                violations.append(GuardrailViolation(
-                    violation_type=ViolationType.SECURITY_RISK,
-                    risk_level=RiskLevel.CRITICAL,
-                    message="Potential SQL injection detected",
-                    details=f"Security pattern matched: {pattern}",
-                    timestamp=datetime.now(),
-                    query=text[:100] + "..." if len(text) > 100 else text
-                ))
+        for pattern in self.sql_patterns.matching(text):
+            violations.append(GuardrailViolation(
+                violation_type=ViolationType.SECURITY_RISK,
+                risk_level=RiskLevel.CRITICAL,
+                message="Potential SQL injection detected",
+                details=f"Security pattern matched: {pattern.pattern}",
+                timestamp=datetime.now(),
+                query=text[:100] + "..." if len(text) > 100 else text
+            ))
         
         # Script injection patterns
-        script_patterns = [
-            r'<script[^>]*>.*?</script>',
-            r'javascript:',
-            r'onload\s*=',
-            r'eval\s*\(',
-        ]
-        
-        for pattern in script_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                violations.append(GuardrailViolation(
-                    violation_type=ViolationType.SECURITY_RISK,
-                    risk_level=RiskLevel.HIGH,
-                    message="Potential script injection detected",
-                    details=f"Script pattern matched: {pattern}",
-                    timestamp=datetime.now(),
-                    query=text[:100] + "..." if len(text) > 100 else text
-                ))
+        for pattern in self.script_patterns.matching(text):
+            violations.append(GuardrailViolation(
+                violation_type=ViolationType.SECURITY_RISK,
+                risk_level=RiskLevel.HIGH,
+                message="Potential script injection detected",
+                details=f"Script pattern matched: {pattern.pattern}",
+                timestamp=datetime.now(),
+                query=text[:100] + "..." if len(text) > 100 else text
+            ))
         
         return violations
     
@@ -289,7 +471,8 @@ class HRGuardrails:
         violations = []
         sanitized_response = response
         
-        for pattern in self.pii_patterns:
+        # Redaction cannot create new PII matches, so only patterns found in the original are re-run
+        for pattern in self.pii_patterns.matching(response):
             matches = pattern.findall(sanitized_response)
             if matches:
                 violations.append(GuardrailViolation(
@@ -304,12 +487,28 @@ class HRGuardrails:
         
         return sanitized_response, violations
     
+    def redact_pii(self, text: str) -> str:
+        """Mask PII in text without recording violations (used for streamed chunks)"""
+        for pattern in self.pii_patterns.matching(text):
+            text = pattern.sub("[REDACTED]", text)
+        return text
+    
     def _check_confidential_info(self, response: str) -> List[GuardrailViolation]:
         """Check for confidential information in responses"""
         violations = []
+        lowered = response.lower()
+        
+        if self._confidential_automaton is not None:
+            # All keywords found in a single pass over the response
+            found = {keyword for _, keyword in self._confidential_automaton.iter(lowered)}
+        else:
+            # One alternation scan rules out the common no-keyword case
+            if not self._confidential_re.search(lowered):
+                return violations
+            found = {keyword for keyword in self._confidential_lower if keyword in lowered}
         
-        for keyword in self.confidential_keywords:
-            if keyword.lower() in response.lower():
+        for keyword, keyword_lower in zip(self.confidential_keywords, self._confidential_lower):
+            if keyword_lower in found:
                 violations.append(GuardrailViolation(
                     violation_type=ViolationType.CONFIDENTIAL_INFO,
                     risk_level=RiskLevel.MEDIUM,
@@ -325,70 +524,54 @@ class HRGuardrails:
         violations = []
         
         # Check for blocked patterns in response
-        for pattern in self.blocked_patterns:
-            if pattern.search(response):
-                violations.append(GuardrailViolation(
-                    violation_type=ViolationType.INAPPROPRIATE_CONTENT,
-                    risk_level=RiskLevel.HIGH,
-                    message="Inappropriate content in response",
-                    details=f"Response contains blocked pattern: {pattern.pattern}",
-                    timestamp=datetime.now()
-                ))
+        for pattern in self.blocked_patterns.matching(response):
+            violations.append(GuardrailViolation(
+                violation_type=ViolationType.INAPPROPRIATE_CONTENT,
+                risk_level=RiskLevel.HIGH,
+                message="Inappropriate content in response",
+                details=f"Response contains blocked pattern: {pattern.pattern}",
+                timestamp=datetime.now()
+            ))
         
         return violations
     
     def _contains_sensitive_topic(self, response: str) -> bool:
         """Check if response contains sensitive HR topics"""
-        sensitive_topics = [
-            'salary', 'compensation', 'disciplinary', 'termination',
-            'legal', 'lawsuit', 'discrimination', 'harassment',
-            'medical', 'disability', 'mental health'
-        ]
-        
-        return any(topic.lower() in response.lower() for topic in sensitive_topics)
+        return _SENSITIVE_TOPIC_RE.search(response.lower()) is not None
     
     def _add_hr_disclaimer(self, response: str) -> str:
         """Add appropriate disclaimer for sensitive HR topics"""
-        disclaimer = ("\n\n⚠️ **Disclaimer**: This information is for general guidance only. "
-                     "For specific situations involving compensation, disciplinary actions, "
-                     "legal matters, or personal circumstances, please consult with HR directly "
-                     "or seek appropriate professional advice.")
-        
-        return response + disclaimer
+        return response + HR_DISCLAIMER
+    
+    def warmup(self):
+        """
+        Run every check once on harmless text so one-time costs (regex engine
+        and automaton first use, NumPy dispatch) are paid before real traffic.
+        Nothing is logged or rate-limited.
+        """
+        # ASCII text takes the RE2 set path when available, non-ASCII text the re path
+        for sample in ("warmup check 123", "warmup check ✓"):
+            self._check_content_filter(sample)
+            self._check_pii_exposure(sample)
+            self._check_security_risks(sample)
+            self._sanitize_pii_in_response(sample)
+            self._check_confidential_info(sample)
+            self._check_response_content(sample)
+            self._contains_sensitive_topic(sample)
+        self.violation_stats.summary(datetime.now())
     
     def get_violations_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get summary of violations in the specified time period"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_violations = [v for v in self.violations_log if v.timestamp > cutoff_time]
-        
-        summary = {
-            'total_violations': len(recent_violations),
-            'by_type': {},
-            'by_risk_level': {},
-            'unique_users': set(),
-            'time_period_hours': hours
-        }
-        
-        for violation in recent_violations:
-            # Count by type
-            vtype = violation.violation_type.value
-            summary['by_type'][vtype] = summary['by_type'].get(vtype, 0) + 1
-            
-            # Count by risk level
-            risk = violation.risk_level.value
-            summary['by_risk_level'][risk] = summary['by_risk_level'].get(risk, 0) + 1
-            
-            # Track unique users
-            if violation.user_id:
-                summary['unique_users'].add(violation.user_id)
-        
-        summary['unique_users'] = len(summary['unique_users'])
+        summary = self.violation_stats.summary(datetime.now() - timedelta(hours=hours))
+        summary['time_period_hours'] = hours
         return summary
     
     def clear_old_logs(self, days: int = 30):
         """Clear violation logs older than specified days"""
         cutoff_time = datetime.now() - timedelta(days=days)
-        self.violations_log = [v for v in self.violations_log if v.timestamp > cutoff_time]
+        with self._lock:
+            self.violations_log = [v for v in self.violations_log if v.timestamp > cutoff_time]
+        self.violation_stats.prune(cutoff_time)
         logger.info(f"Cleared violation logs older than {days} days")
 
 # Global guardrails instance
@@ -402,6 +585,18 @@ def validate_response(response: str, query: str, user_id: Optional[str] = None)
     """Convenience function for response validation"""
     return hr_guardrails.validate_response(response, query, user_id)
 
+def validate_response_many(responses: List[str], query: str = "", user_id: Optional[str] = None) -> List[Tuple[str, List[GuardrailViolation]]]:
+    """Convenience function for batched response validation"""
+    return hr_guardrails.validate_response_many(responses, query, user_id)
+
+def redact_pii(text: str) -> str:
+    """Convenience function for PII masking without violation logging"""
+    return hr_guardrails.redact_pii(text)
+
+def warmup():
+    """Convenience function to pay the guardrails' one-time costs up front"""
+    hr_guardrails.warmup()
+
 def get_violations_summary(hours: int = 24) -> Dict[str, Any]:
     """Convenience function for violations summary"""
     return hr_guardrails.get_violations_summary(hours)
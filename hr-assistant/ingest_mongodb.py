@@ -1,12 +1,22 @@
 # HR Assistant Document Ingestion System with MongoDB Vector Storage
 # Import required libraries for text processing and MongoDB integration
 import pathlib, uuid, json, os
+from functools import lru_cache
 import numpy as np  # For basic vector operations
-from pymongo import MongoClient  # For MongoDB database operations
+from pymongo import MongoClient, UpdateOne  # For MongoDB database operations
+from pymongo.errors import OperationFailure
+from pymongo.operations import SearchIndexModel
 from dotenv import load_dotenv  # For loading environment variables from .env file
 from datetime import datetime
 from typing import List, Dict, Any
 
+# Optional JIT compilation for the Hamming-distance kernel
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -64,10 +74,72 @@ class MockEmbedder:
         
         return np.array(embeddings)
 
+def quantize_binary(vector: np.ndarray) -> bytes:
+    """Pack the sign bits of an embedding into a compact 1-bit code (32x smaller than float32)."""
+    return np.packbits(np.asarray(vector) > 0).tobytes()
+
+# Number of set bits for every byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+if NUMBA_AVAILABLE:
+    # Serial on purpose: inputs are small (cache rows, a shortlist) and the kernel is
+    # called from several threads at once, which numba's parallel runtime does not allow
+    @njit(cache=True, nogil=True)
+    def _hamming_kernel(codes, query_code, popcount):
+        distances = np.empty(codes.shape[0], dtype=np.int64)
+        for i in range(codes.shape[0]):
+            total = 0
+            for j in range(codes.shape[1]):
+                total += popcount[codes[i, j] ^ query_code[j]]
+            distances[i] = total
+        return distances
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """
+    Hamming distance between a query code and every row of packed bit codes.
+    
+    Uses a Numba kernel that releases the GIL when numba is installed (compiled
+    once and cached on disk), otherwise a vectorised popcount table lookup.
+    
+    Args:
+        codes (np.ndarray): (N, B) uint8 matrix of packed codes
+        query_code (np.ndarray): (B,) uint8 packed query code
+        
+    Returns:
+        np.ndarray: (N,) number of differing bits per row
+    """
+    if NUMBA_AVAILABLE:
+        return _hamming_kernel(codes, query_code, _POPCOUNT)
+    return _POPCOUNT[codes ^ query_code].sum(axis=1, dtype=np.int64)
+
+def cosine_topk(matrix: np.ndarray, query: np.ndarray, k: int):
+    """
+    Score every row of a float32 matrix against a query and return the top-k.
+    
+    The scoring is a single matrix-vector product, which BLAS executes with
+    SIMD FMA instructions (AVX2/AVX-512 on x86, NEON on ARM64).
+    
+    Args:
+        matrix (np.ndarray): (N, d) float32 matrix of L2-normalised vectors
+        query (np.ndarray): (d,) float32 query vector
+        k (int): Number of results to return
+        
+    Returns:
+        tuple: (indices, scores) sorted by descending score
+    """
+    scores = matrix @ query
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order, scores[order]
+
 class MongoVectorStore:
     """MongoDB-based vector store for HR document embeddings and metadata."""
     
-    def __init__(self, mongo_uri: str, database_name: str = "hr_assistant", collection_name: str = "document_vectors"):
+    def __init__(self, mongo_uri: str, database_name: str = "hr_assistant", collection_name: str = "document_vectors",
+                 vector_index_name: str = None, dimension: int = 1536):
         """
         Initialize MongoDB vector store connection.
         
@@ -75,9 +147,27 @@ class MongoVectorStore:
             mongo_uri (str): MongoDB connection URI from environment variables
             database_name (str): Name of the MongoDB database
             collection_name (str): Name of the collection to store vectors
+            vector_index_name (str): Atlas Vector Search (HNSW) index name
+            dimension (int): Embedding dimension for the vector index
         """
+        self.vector_index_name = vector_index_name or os.getenv('MONGO_VECTOR_INDEX', 'vector_index')
+        self.dimension = dimension
+        # Shortlist size multiplier for the binary first stage
+        self.rerank_factor = int(os.getenv('VECTOR_RERANK_FACTOR', '10'))
+        # Disabled automatically if the server does not support $vectorSearch
+        self.use_vector_search = os.getenv('MONGO_VECTOR_SEARCH', 'true').lower() == 'true'
+        
         try:
-            self.client = MongoClient(mongo_uri)
+            # One pooled client shared by all threads/coroutines; zstd wire
+            # compression (zlib fallback) shrinks vector payloads in transit
+            self.client = MongoClient(
+                mongo_uri,
+                maxPoolSize=int(os.getenv('MONGO_MAX_POOL_SIZE', '100')),
+                minPoolSize=int(os.getenv('MONGO_MIN_POOL_SIZE', '10')),
+                serverSelectionTimeoutMS=5000,
+                retryWrites=True,
+                compressors="zstd,zlib"
+            )
             self.db = self.client[database_name]
             self.collection = self.db[collection_name]
             
@@ -90,6 +180,10 @@ class MongoVectorStore:
             self.collection.create_index("title")
             self.collection.create_index("created_at")
             
+            # HNSW index for approximate nearest-neighbour search (Atlas only)
+            if self.use_vector_search:
+                self.create_vector_search_index()
+            
         except Exception as e:
             print(f"❌ Failed to connect to MongoDB: {e}")
             raise
@@ -113,6 +207,7 @@ class MongoVectorStore:
             document = {
                 "doc_id": meta.get("doc_id", str(uuid.uuid4())),
                 "vector": vector.tolist(),  # Convert numpy array to list for MongoDB storage
+                "vector_bits": quantize_binary(vector),  # 1-bit codes for first-stage search
                 "title": meta.get("title", "Unknown"),
                 "text": meta.get("text", ""),
                 "chunk_index": meta.get("chunk_index", i),
@@ -134,15 +229,159 @@ class MongoVectorStore:
             print(f"❌ Error storing documents in MongoDB: {e}")
             raise
     
+    def create_vector_search_index(self):
+        """
+        Create the Atlas Vector Search (HNSW, cosine) index on the vector field.
+        
+        Returns:
+            bool: True if the index exists or was created
+        """
+        try:
+            existing = {index["name"] for index in self.collection.list_search_indexes()}
+            if self.vector_index_name in existing:
+                return True
+            
+            model = SearchIndexModel(
+                definition={
+                    "fields": [{
+                        "type": "vector",
+                        "path": "vector",
+                        "numDimensions": self.dimension,
+                        "similarity": "cosine"
+                    }]
+                },
+                name=self.vector_index_name,
+                type="vectorSearch"
+            )
+            self.collection.create_search_index(model)
+            print(f"✅ Created vector search index: {self.vector_index_name}")
+            return True
+        except OperationFailure as e:
+            print(f"⚠️  Vector search index unavailable ({e}), using exact search")
+            self.use_vector_search = False
+            return False
+    
+    @staticmethod
+    def _to_metadata(doc: Dict[str, Any]):
+        """
+        Extract the stored vector and result metadata from a MongoDB document.
+        
+        Returns:
+            tuple: (vector, metadata), or (None, None) for documents without embeddings
+        """
+        # Handle both old and new document formats
+        if "vector" in doc:
+            stored_vector = doc["vector"]
+            content = doc.get("text", "")
+            doc_id = doc.get("doc_id", str(doc.get("_id", "")))
+            chunk_index = doc.get("chunk_index", 0)
+            char_count = doc.get("char_count", len(content))
+            source = doc.get("source", "unknown")
+            collection = doc.get("collection", "unknown")
+            file_type = doc.get("file_type", "unknown")
+        elif "embedding" in doc:
+            stored_vector = doc["embedding"]
+            content = doc.get("content", "")
+            doc_id = str(doc.get("_id", ""))
+            chunk_index = doc.get("chunk_index", 0)
+            char_count = len(content)
+            source = doc.get("source", "unknown")
+            collection = "document_vectors"
+            file_type = doc.get("type", "markdown")
+        else:
+            return None, None
+        
+        metadata = {
+            "doc_id": doc_id,
+            "title": doc["title"],
+            "text": content,
+            "chunk_index": chunk_index,
+            "char_count": char_count,
+            "source": source,
+            "collection": collection,
+            "file_type": file_type,
+            "created_at": doc["created_at"]
+        }
+        return stored_vector, metadata
+    
+    def _vector_search(self, query_vector: np.ndarray, top_k: int):
+        """
+        Approximate nearest-neighbour search through the Atlas HNSW index.
+        
+        Returns:
+            tuple: (similarities, metadata) lists
+        """
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": self.vector_index_name,
+                    "path": "vector",
+                    "queryVector": np.asarray(query_vector, dtype=float).tolist(),
+                    "numCandidates": top_k * 20,
+                    "limit": top_k
+                }
+            },
+            {
+                "$project": {
+                    "_id": 1, "doc_id": 1, "title": 1, "text": 1, "chunk_index": 1, "char_count": 1,
+                    "source": 1, "collection": 1, "file_type": 1, "created_at": 1,
+                    "score": {"$meta": "vectorSearchScore"}
+                }
+            }
+        ]
+        
+        similarities = []
+        metadata_results = []
+        for doc in self.collection.aggregate(pipeline):
+            content = doc.get("text", "")
+            # Atlas reports cosine scores as (1 + cos) / 2; map back to cosine
+            similarities.append(2.0 * doc["score"] - 1.0)
+            metadata_results.append({
+                "doc_id": doc.get("doc_id", str(doc.get("_id", ""))),
+                "title": doc["title"],
+                "text": content,
+                "chunk_index": doc.get("chunk_index", 0),
+                "char_count": doc.get("char_count", len(content)),
+                "source": doc.get("source", "unknown"),
+                "collection": doc.get("collection", "unknown"),
+                "file_type": doc.get("file_type", "unknown"),
+                "created_at": doc["created_at"]
+            })
+        
+        return similarities, metadata_results
+    
     def search(self, query_vector: np.ndarray, top_k: int = 5, title_filter: str = None):
         """
         Search for similar vectors using cosine similarity.
         
+        Uses the Atlas Vector Search HNSW index when available and falls back
+        to an exact scan for title-filtered queries or non-Atlas deployments.
+        
         Args:
             query_vector (np.ndarray): Query vector to search for
             top_k (int): Number of top results to return
             title_filter (str): Optional filter by document title
             
+        Returns:
+            tuple: (similarities, metadata) lists
+        """
+        if self.use_vector_search and not title_filter:
+            try:
+                similarities, metadata_results = self._vector_search(query_vector, top_k)
+                if similarities:
+                    return similarities, metadata_results
+            except OperationFailure as e:
+                print(f"⚠️  $vectorSearch unavailable ({e}), falling back to exact search")
+                self.use_vector_search = False
+            except Exception as e:
+                print(f"❌ Error in vector search: {e}")
+        
+        return self._exact_search(query_vector, top_k, title_filter)
+    
+    def _exact_search(self, query_vector: np.ndarray, top_k: int = 5, title_filter: str = None):
+        """
+        Two-stage search: binary-code Hamming shortlist, then exact cosine rerank.
+        
         Returns:
             tuple: (similarities, metadata) lists
         """
@@ -152,72 +391,85 @@ class MongoVectorStore:
             if title_filter:
                 query_filter["title"] = {"$regex": title_filter, "$options": "i"}
             
-            # Retrieve all vectors from MongoDB
-            cursor = self.collection.find(query_filter)
+            # Stage 1: Hamming-distance shortlist over the 1-bit codes only
+            quantized = list(self.collection.find(
+                {**query_filter, "vector_bits": {"$exists": True}},
+                {"vector_bits": 1}
+            ))
+            candidate_ids = []
+            if quantized:
+                codes = np.frombuffer(b"".join(doc["vector_bits"] for doc in quantized), dtype=np.uint8)
+                codes = codes.reshape(len(quantized), -1)
+                query_code = np.frombuffer(quantize_binary(query_vector), dtype=np.uint8)
+                distances = hamming_distances(codes, query_code)
+                shortlist = np.argsort(distances, kind="stable")[:top_k * self.rerank_factor]
+                candidate_ids = [quantized[i]["_id"] for i in shortlist]
+            
+            # Stage 2: fetch full-precision vectors for the shortlist (plus any
+            # legacy documents without codes) and rerank by exact cosine
+            cursor = self.collection.find({
+                **query_filter,
+                "$or": [
+                    {"_id": {"$in": candidate_ids}},
+                    {"vector_bits": {"$exists": False}}
+                ]
+            })
             documents = list(cursor)
             
             if not documents:
                 print("⚠️  No documents found in vector store")
                 return [], []
             
-            # Calculate cosine similarities
-            similarities = []
+            # Pack candidate vectors into one preallocated float32 matrix
+            query = np.asarray(query_vector, dtype=np.float32)
+            matrix = np.empty((len(documents), query.shape[0]), dtype=np.float32)
             metadata_results = []
             
             for doc in documents:
-                # Handle both old and new document formats
-                if "vector" in doc:
-                    stored_vector = np.array(doc["vector"])
-                    content = doc.get("text", "")
-                    doc_id = doc.get("doc_id", str(doc.get("_id", "")))
-                    chunk_index = doc.get("chunk_index", 0)
-                    char_count = doc.get("char_count", len(content))
-                    source = doc.get("source", "unknown")
-                    collection = doc.get("collection", "unknown")
-                    file_type = doc.get("file_type", "unknown")
-                elif "embedding" in doc:
-                    stored_vector = np.array(doc["embedding"])
-                    content = doc.get("content", "")
-                    doc_id = str(doc.get("_id", ""))
-                    chunk_index = doc.get("chunk_index", 0)
-                    char_count = len(content)
-                    source = doc.get("source", "unknown")
-                    collection = "document_vectors"
-                    file_type = doc.get("type", "markdown")
-                else:
-                    continue  # Skip documents without embeddings
-                
-                # Cosine similarity = dot product of normalized vectors
-                similarity = np.dot(query_vector, stored_vector)
-                similarities.append(similarity)
-                
-                # Prepare metadata for results
-                metadata = {
-                    "doc_id": doc_id,
-                    "title": doc["title"],
-                    "text": content,
-                    "chunk_index": chunk_index,
-                    "char_count": char_count,
-                    "source": source,
-                    "collection": collection,
-                    "file_type": file_type,
-                    "created_at": doc["created_at"]
-                }
+                stored_vector, metadata = self._to_metadata(doc)
+                if metadata is None or len(stored_vector) != query.shape[0]:
+                    continue  # Skip documents without (compatible) embeddings
+                matrix[len(metadata_results)] = stored_vector
                 metadata_results.append(metadata)
             
-            # Get top-k most similar documents
-            if similarities:
-                top_indices = np.argsort(similarities)[-top_k:][::-1]
-                top_similarities = [similarities[i] for i in top_indices]
-                top_metadata = [metadata_results[i] for i in top_indices]
-                return top_similarities, top_metadata
-            else:
+            if not metadata_results:
                 return [], []
+            
+            # Cosine similarity = dot product of normalized vectors
+            top_indices, top_scores = cosine_topk(matrix[:len(metadata_results)], query, top_k)
+            return top_scores.tolist(), [metadata_results[i] for i in top_indices]
                 
         except Exception as e:
             print(f"❌ Error searching MongoDB: {e}")
             return [], []
     
+    def backfill_quantized_vectors(self, batch_size: int = 500):
+        """
+        Add 1-bit vector codes to documents stored before quantization existed.
+        
+        Returns:
+            int: Number of documents updated
+        """
+        updated = 0
+        operations = []
+        cursor = self.collection.find(
+            {"vector": {"$exists": True}, "vector_bits": {"$exists": False}},
+            {"vector": 1}
+        )
+        for doc in cursor:
+            operations.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"vector_bits": quantize_binary(np.asarray(doc["vector"]))}}
+            ))
+            if len(operations) >= batch_size:
+                updated += self.collection.bulk_write(operations).modified_count
+                operations = []
+        if operations:
+            updated += self.collection.bulk_write(operations).modified_count
+        
+        print(f"🔢 Backfilled binary codes for {updated} documents")
+        return updated
+    
     def get_stats(self):
         """Get statistics about the vector store."""
         try:
@@ -290,14 +542,10 @@ if not MONGO_URI:
     raise ValueError("❌ MONGO_DB_URI not found in environment variables. Please check your .env file.")
 
 # Initialize MongoDB vector store (lazy initialization)
-vector_store = None
-
+@lru_cache(maxsize=None)
 def get_vector_store():
-    """Get vector store instance with lazy initialization"""
-    global vector_store
-    if vector_store is None:
-        vector_store = MongoVectorStore(MONGO_URI, database_name="hr_assistant", collection_name="document_vectors")
-    return vector_store
+    """Get the process-wide vector store instance, connecting on first use"""
+    return MongoVectorStore(MONGO_URI, database_name="hr_assistant", collection_name="document_vectors")
 
 def chunk_text(text: str, chunk_size: int = 900, chunk_overlap: int = 120) -> List[str]:
     """Simple text chunking function"""
@@ -653,5 +901,5 @@ if __name__ == "__main__":
         
     finally:
         # Always close the MongoDB connection
-        if vector_store is not None:
-            vector_store.close()
+        if get_vector_store.cache_info().currsize:
+            get_vector_store().close()
@@ -155,7 +155,7 @@ class HRAssistantMCPServer:
         logger.info(f"🔍 MCP: Searching documents for '{query}'")
         
         # Retrieve documents
-        documents = self.rag_system.retrieve_relevant_documents(query, top_k)
+        documents = await self.rag_system.retrieve_relevant_documents(query, top_k)
         
         # Format results
         result_text = f"📋 Found {len(documents)} relevant documents for '{query}':\n\n"
@@ -183,7 +183,7 @@ class HRAssistantMCPServer:
         logger.info(f"🤖 MCP: Processing RAG question '{question}'")
         
         # Get RAG response
-        rag_response = self.rag_system.answer_query(
+        rag_response = await self.rag_system.answer_query(
             query=question,
             max_sources=max_sources,
             include_sources=include_sources
@@ -3,25 +3,39 @@
 
 import os
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import pickle
+import threading
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from datetime import datetime
 from dotenv import load_dotenv
 
+import httpx
+import numpy as np
+
 # FastAPI and web components
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 # LLM integrations
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 # MongoDB and vector components
-from ingest_mongodb import get_vector_store, OpenAIEmbedder, MockEmbedder
+from ingest_mongodb import get_vector_store, hamming_distances, OpenAIEmbedder, MockEmbedder
 
 # Guardrails integration
-from guardrails import validate_query, validate_response, get_violations_summary
+from guardrails import validate_query, validate_response, get_violations_summary, redact_pii
+
+# Optional shared retrieval cache
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +44,39 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Invariant instructions sent as the system message. Keep this byte-identical
+# across requests (no timestamps or scores) so the provider's prompt caching
+# can reuse the prefix.
+SYSTEM_PROMPT = """You are an HR Assistant AI helping employees find information from company documents.
+Based on the retrieved context in the user message, provide a comprehensive and helpful answer to the user's question.
+
+INSTRUCTIONS:
+1. Answer the question directly and comprehensively
+2. Use information from the provided context documents
+3. If the context doesn't contain enough information, say so clearly
+4. Cite which documents you're referencing when possible
+5. Be helpful and professional in your response
+6. If the question is about policies, provide specific details and any relevant procedures"""
+
+# Per-document block inside the context section of the user prompt. Scores
+# are omitted: documents are already filtered by relevance and the numbers
+# only add prompt tokens.
+DOC_TEMPLATE = """
+Document: {title} (Chunk {chunk_index})
+Content: {text}
+---"""
+
+# User turn: retrieved context followed by the question
+USER_PROMPT_TEMPLATE = """CONTEXT:
+{context}
+
+QUESTION: {query}"""
+
+# Bound once at import so the per-document loop skips the attribute lookup
+_format_doc = DOC_TEMPLATE.format
+
+LLM_ERROR_MESSAGE = "I apologize, but I encountered an error while generating a response. Please try again or contact support."
+
 class RAGConfig:
     """Configuration for RAG system from environment variables."""
     
@@ -48,6 +95,17 @@ class RAGConfig:
         self.llm_model = os.getenv('LLM_MODEL', 'gpt-3.5-turbo')
         self.max_tokens = int(os.getenv('LLM_MAX_TOKENS', '1000'))
         self.temperature = float(os.getenv('LLM_TEMPERATURE', '0.7'))
+        
+        # Semantic cache settings
+        self.cache_size = int(os.getenv('RAG_CACHE_SIZE', '512'))
+        self.cache_threshold = float(os.getenv('RAG_CACHE_THRESHOLD', '0.95'))
+        
+        # Shared (cross-worker) retrieval cache; disabled when REDIS_URL is unset
+        self.redis_url = os.getenv('REDIS_URL')
+        self.redis_ttl_seconds = int(os.getenv('REDIS_CACHE_TTL', '900'))
+        
+        # Health check settings
+        self.health_ttl_seconds = float(os.getenv('HEALTH_TTL_SECONDS', '30'))
 
 class RAGResponse(BaseModel):
     """Response model for RAG queries."""
@@ -67,6 +125,225 @@ class RAGQuery(BaseModel):
     include_sources: bool = Field(True, description="Whether to include source documents in response")
     context_window: int = Field(3000, description="Maximum context length for LLM")
 
+# Most questions one /ask/batch request may fan out into concurrent LLM calls
+MAX_BATCH_QUERIES = 16
+
+class BatchQuery(BaseModel):
+    """Request model for batched RAG queries."""
+    queries: List[str] = Field(..., max_length=MAX_BATCH_QUERIES, description="Questions to answer")
+    max_sources: int = Field(5, description="Maximum number of source documents per query")
+    include_sources: bool = Field(True, description="Whether to include source documents in responses")
+    context_window: int = Field(3000, description="Maximum context length for LLM")
+
+# Random hyperplanes for the retrieval-cache SimHash, keyed by dimension.
+# Fixed seed so every worker derives the same key for the same embedding.
+_SIMHASH_PLANES: Dict[int, np.ndarray] = {}
+
+def simhash(vector: np.ndarray, bits: int = 64) -> int:
+    """
+    Compute a SimHash of an embedding from the signs of random projections.
+    
+    Args:
+        vector (np.ndarray): Query embedding
+        bits (int): Hash width in bits
+        
+    Returns:
+        int: ``bits``-wide integer hash; near-identical embeddings collide
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    planes = _SIMHASH_PLANES.get(vector.shape[0])
+    if planes is None:
+        planes = np.random.RandomState(1234).randn(bits, vector.shape[0]).astype(np.float32)
+        _SIMHASH_PLANES[vector.shape[0]] = planes
+    
+    code = 0
+    for bit in (planes @ vector) > 0:
+        code = (code << 1) | int(bit)
+    return code
+
+def batch_to_records(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert a struct-of-arrays document batch into per-document dicts."""
+    return [
+        {
+            "rank": rank,
+            "similarity_score": similarity,
+            "title": title,
+            "text": text,
+            "chunk_index": chunk_index,
+            "doc_id": doc_id,
+            "source": source,
+            "created_at": created_at
+        }
+        for rank, (similarity, title, text, chunk_index, doc_id, source, created_at) in enumerate(zip(
+            batch["similarities"].tolist(), batch["titles"], batch["texts"], batch["chunk_indices"],
+            batch["doc_ids"], batch["sources"], batch["created_at"]
+        ), start=1)
+    ]
+
+class SemanticCache:
+    """
+    In-process semantic cache for RAG responses.
+    
+    Stores L2-normalised query embeddings in a preallocated matrix and returns
+    the cached response when an incoming query has cosine similarity above the
+    threshold. Random-projection LSH codes prefilter candidates so only entries
+    within a small Hamming radius are scored exactly. Eviction is FIFO.
+    """
+    
+    def __init__(self, dimension: int, capacity: int = 512, threshold: float = 0.95,
+                 num_planes: int = 16, max_hamming: int = 4):
+        self.dimension = dimension
+        self.capacity = capacity
+        self.threshold = threshold
+        self.max_hamming = max_hamming
+        
+        rng = np.random.default_rng(42)
+        self._planes = rng.standard_normal((dimension, num_planes)).astype(np.float32)
+        self._vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self._codes = np.zeros((capacity, (num_planes + 7) // 8), dtype=np.uint8)
+        self._entries: List[Optional[Tuple[Tuple, RAGResponse]]] = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _code(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors @ self._planes > 0, axis=-1)
+    
+    def lookup(self, query_vector: np.ndarray, params: Tuple) -> Optional[RAGResponse]:
+        """Return a cached response for a semantically equivalent query, if any."""
+        q = self._normalize(query_vector)
+        code = self._code(q)
+        
+        with self._lock:
+            if self._size == 0:
+                self.misses += 1
+                return None
+            
+            # LSH prefilter: candidates within max_hamming differing bits
+            distances = hamming_distances(self._codes[:self._size], code)
+            candidates = np.flatnonzero(distances <= self.max_hamming)
+            
+            if candidates.size:
+                sims = self._vectors[candidates] @ q
+                order = np.argsort(sims)[::-1]
+                for idx in order:
+                    if sims[idx] < self.threshold:
+                        break
+                    cached_params, response = self._entries[candidates[idx]]
+                    if cached_params == params:
+                        self.hits += 1
+                        return response
+            
+            self.misses += 1
+            return None
+    
+    def insert(self, query_vector: np.ndarray, params: Tuple, response: RAGResponse):
+        """Store a response, evicting the oldest entry once the cache is full."""
+        q = self._normalize(query_vector)
+        
+        with self._lock:
+            slot = self._next
+            self._vectors[slot] = q
+            self._codes[slot] = self._code(q)
+            self._entries[slot] = (params, response)
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+    
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries = [None] * self.capacity
+            self._size = 0
+            self._next = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class AsyncEmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into batched OpenAI API calls.
+    
+    Pending queries are pooled for up to ``max_wait_ms`` (or until ``max_batch``
+    items are queued) and sent as a single ``embeddings.create`` request.
+    """
+    
+    # OpenAI accepts at most 2048 inputs per embeddings request
+    MAX_API_BATCH = 2048
+    
+    def __init__(self, client: AsyncOpenAI, model: str, max_batch: int = 100, max_wait_ms: float = 20.0):
+        self.client = client
+        self.model = model
+        self.max_batch = min(max_batch, self.MAX_API_BATCH)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed a single text, sharing the API call with other pending requests."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                response = await self.client.embeddings.create(input=texts, model=self.model)
+                for (_, future), item in zip(batch, response.data):
+                    if not future.done():
+                        future.set_result(np.array(item.embedding))
+                logger.info(f"📦 Embedded batch of {len(texts)} queries")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    async def close(self):
+        """Stop the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
 class HRAssistantRAG:
     """
     HR Assistant RAG System
@@ -91,105 +368,190 @@ class HRAssistantRAG:
             self.embedder = MockEmbedder(dimension=1536)
             logger.info(f"✅ Using MockEmbedder (dimension: {self.embedder.dimension})")
         
-        # OpenAI client
+        # OpenAI clients; the async client multiplexes requests over a
+        # persistent HTTP/2 connection pool shared by all coroutines
         self.openai_client = OpenAI(api_key=config.openai_api_key)
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+        self.async_client = AsyncOpenAI(api_key=config.openai_api_key, http_client=self._http)
+        
+        # Last successful OpenAI health ping (monotonic seconds)
+        self._last_ping = float('-inf')
+        
+        # Batch concurrent query embeddings into shared API calls
+        self.embed_batcher = None
+        if isinstance(self.embedder, OpenAIEmbedder):
+            self.embed_batcher = AsyncEmbeddingBatcher(self.async_client, model=self.embedder.model)
+        
+        # Semantic cache in front of retrieval + generation
+        self.cache = SemanticCache(
+            dimension=self.embedder.dimension,
+            capacity=config.cache_size,
+            threshold=config.cache_threshold
+        )
+        
+        # Redis L2 cache for retrieved documents, shared across workers/restarts
+        self.redis = None
+        if config.redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = aioredis.Redis.from_url(config.redis_url, decode_responses=False)
+                logger.info("✅ Redis retrieval cache enabled")
+            else:
+                logger.warning("⚠️  REDIS_URL is set but redis is not installed - retrieval cache disabled")
         
         logger.info(f"✅ RAG System initialized with model: {config.llm_model}")
     
-    def retrieve_relevant_documents(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    async def embed_query(self, query: str) -> np.ndarray:
         """
-        Retrieve relevant documents from MongoDB vector store.
+        Generate the embedding for a single query.
+        
+        Args:
+            query (str): User query
+            
+        Returns:
+            np.ndarray: Query embedding
+        """
+        if self.embed_batcher is not None:
+            try:
+                return await self.embed_batcher.embed(query)
+            except Exception as e:
+                logger.warning(f"⚠️  Batched embedding failed: {e}, falling back to direct encode")
+        
+        vectors = await asyncio.to_thread(self.embedder.encode, [query])
+        return vectors[0]
+    
+    async def retrieve_document_batch(self, query: str, top_k: int = 5,
+                                      query_vector: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Retrieve relevant documents as a struct-of-arrays batch.
         
         Args:
             query (str): User query
             top_k (int): Number of documents to retrieve
+            query_vector (np.ndarray): Precomputed query embedding (optional)
             
         Returns:
-            List[Dict]: Retrieved documents with metadata
+            Dict: Parallel arrays keyed by field (similarities, titles, texts, ...)
         """
         logger.info(f"🔍 Retrieving documents for: '{query}'")
         
         # Generate query embedding
-        query_vector = self.embedder.encode([query])[0]
+        if query_vector is None:
+            query_vector = await self.embed_query(query)
         
-        # Search MongoDB vector store
-        similarities, metadata_results = self.vector_store.search(
-            query_vector, 
-            top_k=top_k
-        )
+        # Check the shared retrieval cache, then search MongoDB vector store
+        cache_key = f"rag:v1:{top_k}:{simhash(query_vector):016x}"
+        cached = await self._redis_get(cache_key)
         
-        # Format results
-        documents = []
-        for i, (similarity, metadata) in enumerate(zip(similarities, metadata_results)):
-            doc = {
-                "rank": i + 1,
-                "similarity_score": float(similarity),
-                "title": metadata["title"],
-                "text": metadata["text"],
-                "chunk_index": metadata["chunk_index"],
-                "doc_id": metadata["doc_id"],
-                "source": metadata["source"],
-                "created_at": metadata["created_at"]
-            }
-            documents.append(doc)
+        if cached is not None:
+            similarities, metadata_results = pickle.loads(cached)
+            logger.info("⚡ Redis retrieval cache hit")
+        else:
+            similarities, metadata_results = await asyncio.to_thread(
+                self.vector_store.search,
+                query_vector, 
+                top_k=top_k
+            )
+            await self._redis_set(cache_key, pickle.dumps((similarities, metadata_results)))
         
-        logger.info(f"📋 Retrieved {len(documents)} relevant documents")
-        return documents
+        batch = {
+            "similarities": np.asarray(similarities, dtype=np.float32),
+            "titles": [m["title"] for m in metadata_results],
+            "texts": [m["text"] for m in metadata_results],
+            "chunk_indices": [m["chunk_index"] for m in metadata_results],
+            "doc_ids": [m["doc_id"] for m in metadata_results],
+            "sources": [m["source"] for m in metadata_results],
+            "created_at": [m["created_at"] for m in metadata_results]
+        }
+        
+        logger.info(f"📋 Retrieved {len(batch['titles'])} relevant documents")
+        return batch
+    
+    async def _redis_get(self, key: str) -> Optional[bytes]:
+        """Read from the Redis cache; errors are logged and treated as a miss."""
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️  Redis cache read failed: {e}")
+            return None
+    
+    async def _redis_set(self, key: str, value: bytes):
+        """Write to the Redis cache with the configured TTL; errors are logged."""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(key, value, ex=self.config.redis_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️  Redis cache write failed: {e}")
     
-    def create_context_prompt(self, query: str, documents: List[Dict[str, Any]], context_window: int = 3000) -> str:
+    async def retrieve_relevant_documents(self, query: str, top_k: int = 5,
+                                          query_vector: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant documents from MongoDB vector store.
+        
+        Args:
+            query (str): User query
+            top_k (int): Number of documents to retrieve
+            query_vector (np.ndarray): Precomputed query embedding (optional)
+            
+        Returns:
+            List[Dict]: Retrieved documents with metadata
+        """
+        batch = await self.retrieve_document_batch(query, top_k, query_vector)
+        return batch_to_records(batch)
+    
+    def create_context_prompt(self, query: str, documents: Dict[str, Any], context_window: int = 3000) -> str:
         """
         Create a context-aware prompt for the LLM.
         
         Args:
             query (str): User query
-            documents (List[Dict]): Retrieved documents
+            documents (Dict): Retrieved document batch (struct-of-arrays)
             context_window (int): Maximum context length
             
         Returns:
-            str: Formatted prompt for LLM
+            str: User-turn prompt (context + question); instructions live in SYSTEM_PROMPT
         """
-        # Build context from retrieved documents
-        context_parts = []
-        current_length = 0
+        # Prefix-sum cutoff: keep documents while cumulative text length fits the window
+        texts = documents["texts"]
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        cutoff = int(np.searchsorted(lengths.cumsum(), context_window))
         
-        for doc in documents:
-            text_snippet = doc["text"]
-            snippet_length = len(text_snippet)
-            
-            if current_length + snippet_length < context_window:
-                context_parts.append(f"""
-Document: {doc['title']} (Chunk {doc['chunk_index']})
-Relevance Score: {doc['similarity_score']:.3f}
-Content: {text_snippet}
----""")
-                current_length += snippet_length
-            else:
-                break
+        context_parts = [
+            (doc_id, _format_doc(title=title, chunk_index=chunk_index, text=text))
+            for title, text, chunk_index, doc_id in zip(
+                documents["titles"][:cutoff], texts[:cutoff],
+                documents["chunk_indices"][:cutoff], documents["doc_ids"][:cutoff]
+            )
+        ]
         
-        context = "\n".join(context_parts)
+        # Deterministic document order keeps repeated context byte-identical
+        context_parts.sort(key=lambda part: part[0])
+        context = "\n".join(part for _, part in context_parts)
         
-        # Create the prompt
-        prompt = f"""You are an HR Assistant AI helping employees find information from company documents. 
-Based on the retrieved context below, provide a comprehensive and helpful answer to the user's question.
-
-CONTEXT FROM HR DOCUMENTS:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-1. Answer the question directly and comprehensively
-2. Use information from the provided context documents
-3. If the context doesn't contain enough information, say so clearly
-4. Cite which documents you're referencing when possible
-5. Be helpful and professional in your response
-6. If the question is about policies, provide specific details and any relevant procedures
-
-ANSWER:"""
-
-        return prompt
+        # Only the variable context and question go in the user turn
+        return USER_PROMPT_TEMPLATE.format(context=context, query=query)
     
-    def generate_llm_response(self, prompt: str) -> str:
+    @staticmethod
+    def _build_messages(prompt: str) -> List[Dict[str, str]]:
+        """Chat messages for a context prompt: fixed system prefix + variable user turn."""
+        return [
+            {
+                "role": "system", 
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+    
+    async def generate_llm_response(self, prompt: str) -> str:
         """
         Generate response using OpenAI LLM.
         
@@ -202,18 +564,9 @@ ANSWER:"""
         try:
             logger.info(f"🤖 Generating response with {self.config.llm_model}")
             
-            response = self.openai_client.chat.completions.create(
+            response = await self.async_client.chat.completions.create(
                 model=self.config.llm_model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a helpful HR Assistant AI that provides accurate information based on company documents."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+                messages=self._build_messages(prompt),
                 max_tokens=self.config.max_tokens,
                 temperature=self.config.temperature,
                 stream=False
@@ -225,9 +578,9 @@ ANSWER:"""
             
         except Exception as e:
             logger.error(f"❌ Error generating LLM response: {e}")
-            return f"I apologize, but I encountered an error while generating a response. Please try again or contact support. Error: {str(e)}"
+            return f"{LLM_ERROR_MESSAGE} Error: {str(e)}"
     
-    def answer_query(self, query: str, max_sources: int = 5, include_sources: bool = True, context_window: int = 3000) -> RAGResponse:
+    async def answer_query(self, query: str, max_sources: int = 5, include_sources: bool = True, context_window: int = 3000) -> RAGResponse:
         """
         Main RAG pipeline: Retrieve + Generate answer.
         
@@ -245,33 +598,109 @@ ANSWER:"""
         
         logger.info(f"🎯 Processing RAG query: '{query}'")
         
+        # Step 0: Check semantic cache
+        query_vector = await self.embed_query(query)
+        cache_params = (max_sources, include_sources, context_window)
+        cached = self.cache.lookup(query_vector, cache_params)
+        
+        if cached is not None:
+            processing_time = (time.time() - start_time) * 1000
+            logger.info(f"⚡ Semantic cache hit in {processing_time:.2f}ms")
+            return cached.model_copy(deep=True, update={
+                "query": query,
+                "processing_time_ms": round(processing_time, 2),
+                "timestamp": datetime.utcnow(),
+                "metadata": {"cache_hit": True}
+            })
+        
         # Step 1: Retrieve relevant documents
-        documents = self.retrieve_relevant_documents(query, top_k=max_sources)
+        documents = await self.retrieve_document_batch(query, top_k=max_sources, query_vector=query_vector)
         
         # Step 2: Create context-aware prompt
         prompt = self.create_context_prompt(query, documents, context_window)
         
         # Step 3: Generate LLM response
-        answer = self.generate_llm_response(prompt)
+        answer = await self.generate_llm_response(prompt)
         
         # Step 4: Format response
         processing_time = (time.time() - start_time) * 1000
         
-        sources = documents if include_sources else []
+        # Materialize per-document dicts only when they are returned
+        sources = batch_to_records(documents) if include_sources else []
         
         response = RAGResponse(
             query=query,
             answer=answer,
             sources=sources,
-            retrieval_count=len(documents),
+            retrieval_count=len(documents["titles"]),
             processing_time_ms=round(processing_time, 2),
             model_used=self.config.llm_model,
             timestamp=datetime.utcnow(),
             metadata={}
         )
         
+        # Cache a private copy so callers can mutate the returned response
+        if not answer.startswith(LLM_ERROR_MESSAGE):
+            self.cache.insert(query_vector, cache_params, response.model_copy(deep=True))
+        
         logger.info(f"✅ RAG query completed in {processing_time:.2f}ms")
         return response
+    
+    async def stream_answer(self, query: str, max_sources: int = 5, context_window: int = 3000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming RAG pipeline: retrieve, then yield LLM tokens as they arrive.
+        
+        Args:
+            query (str): User question
+            max_sources (int): Maximum number of source documents
+            context_window (int): Maximum context length
+            
+        Yields:
+            Dict: ``{"type": "sources", "sources": [...]}`` once, then
+            ``{"type": "token", "content": str}`` for each generated delta
+        """
+        logger.info(f"🎯 Streaming RAG query: '{query}'")
+        
+        documents = await self.retrieve_document_batch(query, top_k=max_sources)
+        yield {"type": "sources", "sources": batch_to_records(documents)}
+        
+        prompt = self.create_context_prompt(query, documents, context_window)
+        stream = await self.async_client.chat.completions.create(
+            model=self.config.llm_model,
+            messages=self._build_messages(prompt),
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield {"type": "token", "content": chunk.choices[0].delta.content}
+    
+    async def ping_llm(self):
+        """
+        Verify OpenAI connectivity with a models.retrieve call (no tokens billed).
+        
+        A successful ping is reused for ``health_ttl_seconds`` so frequent
+        load-balancer probes do not hit the API; failures are never cached
+        and propagate to the caller.
+        """
+        import time
+        
+        if time.monotonic() - self._last_ping < self.config.health_ttl_seconds:
+            return
+        
+        await self.async_client.models.retrieve(self.config.llm_model)
+        self._last_ping = time.monotonic()
+    
+    async def close(self):
+        """Release the embedding batcher, HTTP pool, Redis, and MongoDB connection."""
+        if self.embed_batcher is not None:
+            await self.embed_batcher.close()
+        if self.redis is not None:
+            await self.redis.aclose()
+        await self._http.aclose()
+        self.vector_store.close()
 
 # Initialize RAG system
 config = RAGConfig()
@@ -310,7 +739,10 @@ async def root():
             },
             "endpoints": {
                 "ask": "POST /ask",
+                "ask_stream": "POST /ask/stream",
+                "ask_batch": "POST /ask/batch",
                 "query": "GET /query?q=...",
+                "cache": "/cache/stats",
                 "health": "/health",
                 "docs": "/docs"
             }
@@ -337,7 +769,7 @@ async def ask_question(query: RAGQuery):
     """
     try:
         # Apply guardrails to query
-        is_allowed, violations = validate_query(query.query, user_id=None)
+        is_allowed, violations = await asyncio.to_thread(validate_query, query.query, user_id=None)
         
         if not is_allowed:
             violation_messages = [v.message for v in violations]
@@ -351,7 +783,7 @@ async def ask_question(query: RAGQuery):
             )
         
         # Process query through RAG system
-        response = rag_system.answer_query(
+        response = await rag_system.answer_query(
             query=query.query,
             max_sources=query.max_sources,
             include_sources=query.include_sources,
@@ -359,8 +791,8 @@ async def ask_question(query: RAGQuery):
         )
         
         # Apply guardrails to response
-        filtered_answer, response_violations = validate_response(
-            response.answer, query.query, user_id=None
+        filtered_answer, response_violations = await asyncio.to_thread(
+            validate_response, response.answer, query.query, user_id=None
         )
         
         # Update response with filtered content
@@ -380,6 +812,140 @@ async def ask_question(query: RAGQuery):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG query failed: {str(e)}")
 
+@app.post("/ask/batch", summary="Ask Multiple HR Questions (RAG)")
+async def ask_batch(batch: BatchQuery):
+    """
+    Answer several questions concurrently with guardrails.
+    
+    Queries are processed in parallel, so their embeddings share batched
+    API calls and the LLM requests overlap. Results are returned in input
+    order; a query rejected by the guardrails or failing in the pipeline
+    yields an ``error`` entry instead of failing the whole batch.
+    """
+    async def answer_one(q: str) -> Dict[str, Any]:
+        is_allowed, violations = await asyncio.to_thread(validate_query, q, user_id=None)
+        
+        if not is_allowed:
+            return {
+                "query": q,
+                "error": "Query rejected by content policy",
+                "violations": [v.message for v in violations]
+            }
+        
+        try:
+            response = await rag_system.answer_query(
+                query=q,
+                max_sources=batch.max_sources,
+                include_sources=batch.include_sources,
+                context_window=batch.context_window
+            )
+            filtered_answer, response_violations = await asyncio.to_thread(validate_response, response.answer, q, user_id=None)
+        except Exception as e:
+            return {"query": q, "error": f"RAG query failed: {str(e)}"}
+        
+        response.answer = filtered_answer
+        response.metadata["guardrails"] = {
+            "query_violations": len(violations),
+            "response_violations": len(response_violations),
+            "content_filtered": len(response_violations) > 0
+        }
+        return response.model_dump()
+    
+    results = await asyncio.gather(*(answer_one(q) for q in batch.queries))
+    
+    return {
+        "results": results,
+        "total_queries": len(results),
+        "failed": sum(1 for r in results if "error" in r)
+    }
+
+def _sse(event: Dict[str, Any]) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"data: {json.dumps(event, default=str)}\n\n"
+
+# Characters held back from the client so PII split across tokens is redacted
+STREAM_HOLDBACK_CHARS = 64
+
+@app.post("/ask/stream", summary="Ask HR Question (RAG, streamed)")
+async def ask_question_stream(query: RAGQuery):
+    """
+    Ask a question using RAG and stream the answer as server-sent events.
+    
+    Events are JSON objects with a ``type`` of ``sources``, ``token``,
+    ``done`` or ``error``. Generated text is released through a sliding
+    PII-redaction window; the full answer is validated by the guardrails
+    once generation finishes and any disclaimer is sent as a final token.
+    """
+    is_allowed, violations = await asyncio.to_thread(validate_query, query.query, user_id=None)
+    
+    if not is_allowed:
+        violation_messages = [v.message for v in violations]
+        raise HTTPException(
+            status_code=400, 
+            detail={
+                "error": "Query rejected by content policy",
+                "violations": violation_messages,
+                "message": "Your query contains content that violates our usage policy. Please rephrase your question appropriately."
+            }
+        )
+    
+    async def event_stream():
+        import time
+        start_time = time.time()
+        raw_parts = []
+        pending = ""
+        
+        try:
+            async for event in rag_system.stream_answer(
+                query.query,
+                max_sources=query.max_sources,
+                context_window=query.context_window
+            ):
+                if event["type"] == "sources":
+                    if query.include_sources:
+                        yield _sse(event)
+                    continue
+                
+                raw_parts.append(event["content"])
+                pending = redact_pii(pending + event["content"])
+                
+                if len(pending) > STREAM_HOLDBACK_CHARS:
+                    cut = len(pending) - STREAM_HOLDBACK_CHARS
+                    boundary = pending.rfind(" ", 0, cut)
+                    if boundary > 0:
+                        cut = boundary
+                    safe, pending = pending[:cut], pending[cut:]
+                    yield _sse({"type": "token", "content": safe})
+            
+            if pending:
+                pending = redact_pii(pending)
+                yield _sse({"type": "token", "content": pending})
+            
+            # Full-answer guardrails pass: logs violations and decides on a disclaimer
+            raw_answer = "".join(raw_parts)
+            filtered_answer, response_violations = await asyncio.to_thread(validate_response, raw_answer, query.query, user_id=None)
+            redacted_answer = redact_pii(raw_answer)
+            if filtered_answer.startswith(redacted_answer) and len(filtered_answer) > len(redacted_answer):
+                yield _sse({"type": "token", "content": filtered_answer[len(redacted_answer):]})
+            
+            yield _sse({
+                "type": "done",
+                "model_used": config.llm_model,
+                "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+                "metadata": {
+                    "guardrails": {
+                        "query_violations": len(violations),
+                        "response_violations": len(response_violations),
+                        "content_filtered": len(response_violations) > 0
+                    }
+                }
+            })
+        except Exception as e:
+            logger.error(f"❌ Streaming RAG query failed: {e}")
+            yield _sse({"type": "error", "error": f"RAG query failed: {str(e)}"})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/query", summary="Simple RAG Query (GET)")
 async def simple_query(
     q: str,
@@ -392,7 +958,7 @@ async def simple_query(
     """
     try:
         # Apply guardrails to query
-        is_allowed, violations = validate_query(q, user_id=None)
+        is_allowed, violations = await asyncio.to_thread(validate_query, q, user_id=None)
         
         if not is_allowed:
             violation_messages = [v.message for v in violations]
@@ -411,15 +977,15 @@ async def simple_query(
             include_sources=include_sources
         )
         
-        response = rag_system.answer_query(
+        response = await rag_system.answer_query(
             query=query_obj.query,
             max_sources=query_obj.max_sources,
             include_sources=query_obj.include_sources
         )
         
         # Apply guardrails to response
-        filtered_answer, response_violations = validate_response(
-            response.answer, q, user_id=None
+        filtered_answer, response_violations = await asyncio.to_thread(
+            validate_response, response.answer, q, user_id=None
         )
         
         response.answer = filtered_answer
@@ -448,6 +1014,20 @@ async def guardrails_summary(hours: int = 24):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get guardrails summary: {str(e)}")
 
+@app.get("/cache/stats", summary="Semantic Cache Statistics")
+async def cache_stats():
+    """Get semantic cache size and hit rate."""
+    return {
+        "status": "success",
+        "data": rag_system.cache.get_stats()
+    }
+
+@app.delete("/cache", summary="Clear Semantic Cache")
+async def clear_cache():
+    """Drop all cached RAG responses."""
+    rag_system.cache.clear()
+    return {"status": "success", "message": "Semantic cache cleared"}
+
 @app.get("/health", summary="System Health Check")
 async def health_check():
     """Health check for RAG system components."""
@@ -455,12 +1035,8 @@ async def health_check():
         # Test MongoDB connection
         stats = rag_system.vector_store.get_stats()
         
-        # Test OpenAI connection (simple ping)
-        test_response = rag_system.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "ping"}],
-            max_tokens=5
-        )
+        # Test OpenAI connection (cached, token-free model lookup)
+        await rag_system.ping_llm()
         
         return {
             "status": "healthy",
@@ -532,7 +1108,7 @@ async def shutdown_event():
     """Clean up resources on shutdown."""
     logger.info("🔒 HR Assistant RAG API shutting down...")
     try:
-        rag_system.vector_store.close()
+        await rag_system.close()
         logger.info("✅ MongoDB connection closed")
     except Exception as e:
         logger.error(f"❌ Shutdown error: {e}")
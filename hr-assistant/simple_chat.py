@@ -3,7 +3,16 @@
 
 import streamlit as st
 import requests
+import httpx
+import asyncio
+import copy
 import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 
 # Import guardrails for client-side validation
@@ -23,35 +32,372 @@ st.set_page_config(
 
 # Configuration
 RAG_API_URL = "http://localhost:8001"
+MAX_MESSAGES = 40        # Chat history kept in session state
+SOURCES_KEPT_FOR = 10    # Most recent messages that keep their source documents
+RECENT_MESSAGES = 10     # Messages rendered as individual chat bubbles
+PREVIEW_CHARS = 300      # Source text kept for display
+HISTORY_DB = os.getenv("CHAT_HISTORY_DB", "chat_history.db")
+HISTORY_RETENTION_DAYS = float(os.getenv("CHAT_HISTORY_RETENTION_DAYS", "30"))  # Older messages are deleted
 
-def check_api_health():
-    """Check if the RAG API is available."""
+# Sidebar example questions with stable widget keys
+EXAMPLE_QUESTIONS = [
+    (f"example_{i}", question)
+    for i, question in enumerate([
+        "What are the health insurance benefits?",
+        "How does the retirement plan work?",
+        "What is covered under disability insurance?",
+        "Tell me about dependent care benefits",
+        "What are the eligibility requirements for benefits?"
+    ])
+]
+
+def build_payload(query, max_sources=3):
+    """Request body for the RAG query endpoints."""
+    return {
+        "query": query,
+        "max_sources": max_sources,
+        "include_sources": True,
+        "context_window": 2000
+    }
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session that keeps connections to the RAG API alive across reruns."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+@st.cache_data(ttl=10, show_spinner=False)
+def check_api_health() -> bool:
+    """Check if the RAG API is available (cached for 10 seconds)."""
     try:
-        response = requests.get(f"{RAG_API_URL}/health", timeout=3)
+        response = get_session().get(f"{RAG_API_URL}/health", timeout=3)
         return response.status_code == 200
     except:
         return False
 
+class AnswerCache:
+    """TTL cache of finished answers keyed by question, shared by the /ask and streamed paths."""
+    
+    def __init__(self, ttl=300, max_entries=128):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.ttl = ttl
+        self.max_entries = max_entries
+    
+    def get(self, query, max_sources):
+        """Return a copy of the cached answer, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get((query, max_sources))
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return copy.deepcopy(entry[1])
+    
+    def put(self, query, max_sources, result):
+        """Store an answer, evicting the oldest entries beyond ``max_entries``."""
+        key = (query, max_sources)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+
+@st.cache_resource
+def get_answer_cache():
+    """Process-wide answer cache."""
+    return AnswerCache()
+
+def fetch_answer(query, max_sources=3):
+    """
+    Ask the RAG system a question, reusing answers to repeated questions.
+    
+    Raises on any failure so that errors are never cached.
+    """
+    cache = get_answer_cache()
+    cached = cache.get(query, max_sources)
+    if cached is not None:
+        return cached
+    
+    payload = build_payload(query, max_sources)
+    
+    response = get_session().post(f"{RAG_API_URL}/ask", json=payload, timeout=20)
+    response.raise_for_status()
+    result = response.json()
+    cache.put(query, max_sources, result)
+    return result
+
 def send_query(query, max_sources=3):
     """Send query to the RAG system."""
     try:
-        payload = {
-            "query": query,
-            "max_sources": max_sources,
-            "include_sources": True,
-            "context_window": 2000
-        }
-        
-        response = requests.post(f"{RAG_API_URL}/ask", json=payload, timeout=20)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
+        return fetch_answer(query, max_sources)
+    except requests.HTTPError:
+        return None
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return None
 
+def stream_query(query, result, max_sources=3):
+    """
+    Stream the answer from the RAG system's /ask/stream endpoint.
+    
+    Yields answer text as it is generated; sources, timing and guardrails
+    metadata are stored in ``result`` as their events arrive, and the text
+    received so far is kept in ``result["parts"]``.
+    """
+    payload = build_payload(query, max_sources)
+    parts = result.setdefault("parts", [])
+    
+    with get_session().post(f"{RAG_API_URL}/ask/stream", json=payload, stream=True, timeout=20) as response:
+        response.raise_for_status()
+        
+        for line in response.iter_lines(chunk_size=None):
+            if not line.startswith(b"data: "):
+                continue
+            event = json.loads(line[6:])
+            
+            if event["type"] == "token":
+                parts.append(event["content"])
+                yield event["content"]
+            elif event["type"] == "sources":
+                result["sources"] = event["sources"]
+            elif event["type"] == "done":
+                result.update(event)
+            elif event["type"] == "error":
+                raise RuntimeError(event["error"])
+
+def coalesce_chunks(chunks, min_chars=32, max_delay=0.08):
+    """
+    Group streamed text into larger pieces to limit UI re-renders.
+    
+    A piece is emitted once it holds ``min_chars`` characters or ``max_delay``
+    seconds have passed since the last emit; the remainder is flushed at the end.
+    """
+    buffer = []
+    buffered = 0
+    last_emit = time.monotonic()
+    
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        now = time.monotonic()
+        if buffered >= min_chars or now - last_emit >= max_delay:
+            yield "".join(buffer)
+            buffer, buffered, last_emit = [], 0, now
+    
+    if buffer:
+        yield "".join(buffer)
+
+async def _ask_many(questions, max_sources=3):
+    """POST several questions to /ask concurrently over one connection pool."""
+    async with httpx.AsyncClient(base_url=RAG_API_URL, timeout=20) as client:
+        responses = await asyncio.gather(
+            *(client.post("/ask", json=build_payload(q, max_sources)) for q in questions),
+            return_exceptions=True
+        )
+    
+    return {
+        question: response.json()
+        for question, response in zip(questions, responses)
+        if isinstance(response, httpx.Response) and response.status_code == 200
+    }
+
+def send_queries(questions, max_sources=3):
+    """Answer several questions with one /ask/batch request, keyed by question."""
+    payload = {
+        "queries": list(questions),
+        "max_sources": max_sources,
+        "include_sources": True,
+        "context_window": 2000
+    }
+    
+    response = get_session().post(f"{RAG_API_URL}/ask/batch", json=payload, timeout=60)
+    response.raise_for_status()
+    
+    return {
+        question: result
+        for question, result in zip(questions, response.json()["results"])
+        if "error" not in result
+    }
+
+def prewarm_answers(questions, max_sources=3):
+    """Fetch answers for a list of questions in one batch, keyed by question."""
+    try:
+        return send_queries(questions, max_sources)
+    except requests.RequestException:
+        # Older API without the batch endpoint: fall back to concurrent /ask calls
+        pass
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return {}
+    
+    try:
+        return asyncio.run(_ask_many(questions, max_sources))
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return {}
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_stats():
+    """Fetch RAG system statistics (cached for 30 seconds)."""
+    try:
+        stats_response = get_session().get(f"{RAG_API_URL}/stats", timeout=3)
+        if stats_response.status_code == 200:
+            return stats_response.json()
+    except:
+        pass
+    return None
+
+class ChatHistoryStore:
+    """
+    SQLite log of chat messages per session, shared by all Streamlit sessions.
+    
+    Each session keeps at most ``max_messages`` rows and messages older than
+    ``retention_days`` are deleted, so the database stays bounded.
+    """
+    
+    def __init__(self, path, max_messages=MAX_MESSAGES, retention_days=HISTORY_RETENTION_DAYS):
+        self.max_messages = max_messages
+        self.retention_seconds = retention_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS msgs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                sources TEXT,
+                ts REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_msgs_session ON msgs (session, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_msgs_ts ON msgs (ts)")
+        self._conn.execute("DELETE FROM msgs WHERE ts < ?", (time.time() - self.retention_seconds,))
+        self._conn.commit()
+    
+    def append(self, session_id, message):
+        """Persist one message, trimming the session and expiring old messages."""
+        sources = message.get("sources")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO msgs (session, role, content, sources, ts) VALUES (?, ?, ?, ?, ?)",
+                (session_id, message["role"], message["content"],
+                 json.dumps(sources) if sources else None, now)
+            )
+            # Keep only the newest max_messages rows of this session
+            self._conn.execute(
+                """DELETE FROM msgs WHERE session = ? AND id <= (
+                       SELECT id FROM msgs WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                   )""",
+                (session_id, session_id, self.max_messages)
+            )
+            self._conn.execute("DELETE FROM msgs WHERE ts < ?", (now - self.retention_seconds,))
+            self._conn.commit()
+    
+    def recent(self, session_id, limit):
+        """Return the last ``limit`` messages of a session, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, sources FROM msgs WHERE session = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        
+        messages = []
+        for role, content, sources in reversed(rows):
+            message = {"role": role, "content": content}
+            if sources:
+                message["sources"] = json.loads(sources)
+            messages.append(message)
+        return messages
+    
+    def clear(self, session_id):
+        """Delete a session's messages."""
+        with self._lock:
+            self._conn.execute("DELETE FROM msgs WHERE session = ?", (session_id,))
+            self._conn.commit()
+
+@st.cache_resource
+def get_history_store():
+    """Process-wide chat history database."""
+    return ChatHistoryStore(HISTORY_DB)
+
+def get_session_id():
+    """Session identifier kept in the URL so history survives page reloads."""
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get("sid") or uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+def append_message(message):
+    """Add a message to the chat history, keeping the in-memory copy bounded."""
+    get_history_store().append(get_session_id(), message)
+    
+    messages = st.session_state.messages
+    messages.append(message)
+    
+    # Sliding window over the conversation
+    if len(messages) > MAX_MESSAGES:
+        del messages[:-MAX_MESSAGES]
+    
+    # Older turns keep their text but drop the (large) source documents
+    if len(messages) > SOURCES_KEPT_FOR:
+        messages[-SOURCES_KEPT_FOR - 1].pop("sources", None)
+
+def compact_sources(sources):
+    """Keep only the fields the UI shows, with the text cut to a preview once."""
+    return [
+        {
+            "title": source.get('title', 'Document'),
+            "similarity_score": source.get('similarity_score', 0),
+            "text_preview": source.get('text_preview', source.get('text', ''))[:PREVIEW_CHARS]
+        }
+        for source in sources
+    ]
+
+def render_sources(sources):
+    """Show (compacted) source documents inside a single expander element."""
+    with st.expander(f"📚 Sources ({len(sources)} documents)"):
+        st.markdown("\n\n".join(
+            f"**📄 {source['title']}** (Score: {source['similarity_score']:.3f})\n\n"
+            f"{source['text_preview']}..."
+            for source in sources
+        ))
+
+def render_history(messages):
+    """
+    Render the chat history.
+    
+    Streamlit redraws the whole page on every rerun, so older turns are
+    folded into one collapsed markdown element and only the most recent
+    messages get their own chat bubbles and widgets.
+    """
+    older, recent = messages[:-RECENT_MESSAGES], messages[-RECENT_MESSAGES:]
+    
+    if older:
+        with st.expander(f"🕘 Earlier messages ({len(older)})"):
+            st.markdown("\n\n---\n\n".join(
+                f"**{'You' if message['role'] == 'user' else 'HR Assistant'}:** {message['content']}"
+                for message in older
+            ))
+    
+    for message in recent:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            
+            # Show sources for assistant messages
+            if message["role"] == "assistant" and message.get("sources"):
+                render_sources(message["sources"])
+
 # Main interface
 st.title("🏢 HR Assistant Chat")
 st.markdown("Ask questions about HR policies, benefits, and procedures.")
@@ -62,28 +408,21 @@ if check_api_health():
 else:
     st.error("❌ HR Assistant API is not available. Please start the server first.")
     st.info("Run: `./venv/bin/python rag_system.py` or use `./start_rag.sh` to start the RAG API server")
+    if st.button("🔄 Check Again"):
+        check_api_health.clear()
+        st.rerun()
     st.stop()
 
 # Initialize chat history
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = get_history_store().recent(get_session_id(), MAX_MESSAGES)
+    for message in st.session_state.messages[:-SOURCES_KEPT_FOR]:
+        message.pop("sources", None)
+if "example_answers" not in st.session_state:
+    st.session_state.example_answers = {}
 
 # Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-        
-        # Show sources for assistant messages
-        if message["role"] == "assistant" and "sources" in message:
-            sources = message["sources"]
-            if sources:
-                with st.expander(f"📚 Sources ({len(sources)} documents)"):
-                    for i, source in enumerate(sources):
-                        st.markdown(f"""
-                        **📄 {source.get('title', 'Document')}** (Score: {source.get('similarity_score', 0):.3f})
-                        
-                        {source.get('text_preview', source.get('text', ''))[:300]}...
-                        """)
+render_history(st.session_state.messages)
 
 # Chat input with guardrails
 if prompt := st.chat_input("Ask about HR policies, benefits, or procedures..."):
@@ -99,81 +438,90 @@ if prompt := st.chat_input("Ask about HR policies, benefits, or procedures..."):
             st.stop()
     
     # Add user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    append_message({"role": "user", "content": prompt})
     
     # Display user message
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Get assistant response
+    # Get assistant response, streaming tokens as they are generated
     with st.chat_message("assistant"):
-        with st.spinner("Searching HR documents..."):
-            result = send_query(prompt)
+        result = get_answer_cache().get(prompt, 3)
+        if result is not None:
+            # Repeated question: reuse the finished answer instead of another LLM call
+            answer = result.get("answer", "I couldn't find a relevant answer.")
+            st.markdown(answer)
+        else:
+            result = {}
+            try:
+                answer = st.write_stream(coalesce_chunks(stream_query(prompt, result)))
+                if answer and result.get("type") == "done":
+                    # Cache the completed stream under the same key as /ask answers
+                    get_answer_cache().put(prompt, 3, {
+                        "answer": answer,
+                        "sources": result.get("sources", []),
+                        "processing_time_ms": result.get("processing_time_ms", 0),
+                        "metadata": result.get("metadata", {})
+                    })
+            except Exception as e:
+                if result.get("parts"):
+                    # Keep the partial answer; re-asking would repeat (and re-bill) the LLM call
+                    answer = "".join(result["parts"])
+                    st.error(f"⚠️ The response was interrupted: {str(e)}")
+                else:
+                    # Nothing streamed yet: fall back to the blocking endpoint (e.g. older API without streaming)
+                    with st.spinner("Searching HR documents..."):
+                        result = send_query(prompt)
+                    answer = result.get("answer", "I couldn't find a relevant answer.") if result else None
+                    if answer:
+                        st.markdown(answer)
+        
+        if answer:
+            sources = compact_sources(result.get("sources", []))
+            processing_time = result.get("processing_time_ms", 0)
+            metadata = result.get("metadata", {})
+            guardrails_info = metadata.get("guardrails", {})
             
-            if result:
-                answer = result.get("answer", "I couldn't find a relevant answer.")
-                sources = result.get("sources", [])
-                processing_time = result.get("processing_time_ms", 0)
-                metadata = result.get("metadata", {})
-                guardrails_info = metadata.get("guardrails", {})
-                
-                # Display answer
-                st.markdown(answer)
-                
-                # Show processing time and guardrails info
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.caption(f"⚡ Response time: {processing_time:.0f}ms")
-                with col2:
-                    if guardrails_info.get("content_filtered", False):
-                        st.caption("🛡️ Content filtered for safety")
-                
-                # Add to chat history
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": answer,
-                    "sources": sources,
-                    "guardrails": guardrails_info
-                })
-                
-                # Show sources
-                if sources:
-                    with st.expander(f"📚 Sources ({len(sources)} documents)"):
-                        for i, source in enumerate(sources):
-                            st.markdown(f"""
-                            **📄 {source.get('title', 'Document')}** (Score: {source.get('similarity_score', 0):.3f})
-                            
-                            {source.get('text_preview', source.get('text', ''))[:300]}...
-                            """)
-            else:
-                error_msg = "Sorry, I encountered an error processing your request."
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+            # Show processing time and guardrails info
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption(f"⚡ Response time: {processing_time:.0f}ms")
+            with col2:
+                if guardrails_info.get("content_filtered", False):
+                    st.caption("🛡️ Content filtered for safety")
+            
+            # Add to chat history
+            append_message({
+                "role": "assistant", 
+                "content": answer,
+                "sources": sources,
+                "guardrails": guardrails_info
+            })
+            
+            # Show sources
+            if sources:
+                render_sources(sources)
+        else:
+            error_msg = "Sorry, I encountered an error processing your request."
+            st.error(error_msg)
+            append_message({"role": "assistant", "content": error_msg})
 
 # Sidebar with example questions
 with st.sidebar:
     st.markdown("## 💡 Example Questions")
     
-    example_questions = [
-        "What are the health insurance benefits?",
-        "How does the retirement plan work?",
-        "What is covered under disability insurance?",
-        "Tell me about dependent care benefits",
-        "What are the eligibility requirements for benefits?"
-    ]
-    
-    for question in example_questions:
-        if st.button(question, key=f"example_{hash(question)}"):
+    for key, question in EXAMPLE_QUESTIONS:
+        if st.button(question, key=key):
             # Add the example question as user input
-            st.session_state.messages.append({"role": "user", "content": question})
+            append_message({"role": "user", "content": question})
             
-            # Get response
-            result = send_query(question)
+            # Get response (prewarmed answers are used when available)
+            result = st.session_state.example_answers.get(question) or send_query(question)
             if result:
                 answer = result.get("answer", "I couldn't find a relevant answer.")
-                sources = result.get("sources", [])
+                sources = compact_sources(result.get("sources", []))
                 
-                st.session_state.messages.append({
+                append_message({
                     "role": "assistant", 
                     "content": answer,
                     "sources": sources
@@ -181,11 +529,19 @@ with st.sidebar:
             
             st.rerun()
     
+    if st.button("🔥 Prewarm Examples"):
+        with st.spinner("Fetching example answers..."):
+            st.session_state.example_answers.update(prewarm_answers([question for _, question in EXAMPLE_QUESTIONS]))
+        st.success(f"✅ {len(st.session_state.example_answers)}/{len(EXAMPLE_QUESTIONS)} example answers ready")
+    
     st.markdown("---")
     
     # Clear chat button
     if st.button("🗑️ Clear Chat"):
+        get_history_store().clear(get_session_id())
         st.session_state.messages = []
+        st.session_state.example_answers = {}
+        get_answer_cache().clear()
         st.rerun()
     
     st.markdown("---")
@@ -193,12 +549,12 @@ with st.sidebar:
     st.info("RAG API: http://localhost:8001")
     
     # Try to get system stats
-    try:
-        stats_response = requests.get(f"{RAG_API_URL}/stats", timeout=3)
-        if stats_response.status_code == 200:
-            stats = stats_response.json()
-            if 'database' in stats:
-                db_stats = stats['database']
-                st.metric("Documents", db_stats.get('total_vectors', 0))
-    except:
-        pass
+    stats = get_stats()
+    if stats and 'database' in stats:
+        db_stats = stats['database']
+        st.metric("Documents", db_stats.get('total_vectors', 0))
+    
+    if st.button("🔄 Refresh Status"):
+        check_api_health.clear()
+        get_stats.clear()
+        st.rerun()
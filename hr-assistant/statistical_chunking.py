@@ -6,9 +6,158 @@ including sentence-based, paragraph-based, and statistical boundary detection.
 
 import re
 import numpy as np
+from functools import lru_cache
 from typing import List, Tuple
 from collections import Counter
-import statistics
+
+# Optional JIT compilation for the boundary scan
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _sentence_stats(sentence: str) -> Tuple[int, float]:
+    """
+    Word count and vocabulary diversity of a sentence.
+    
+    The sentence is lower-cased once before splitting, so the distinct-word
+    set is built in C without a per-word ``lower()`` call.
+    """
+    words = sentence.lower().split()
+    if not words:
+        return 0, 0.0
+    return len(words), len(set(words)) / len(words)
+
+
+def _find_boundaries(lengths: np.ndarray, vocab_diversity: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Positions where sentence length or vocabulary diversity shift significantly.
+    
+    Compares the mean of the ``window_size`` sentences before each position
+    with the mean of the ``window_size`` sentences from it onwards, using
+    prefix sums so every window is evaluated in a single vectorised pass.
+    """
+    positions = np.arange(window_size, max(len(lengths) - window_size, window_size))
+    length_sums = np.concatenate(([0], np.cumsum(lengths)))
+    vocab_sums = np.concatenate(([0.0], np.cumsum(vocab_diversity)))
+    
+    before_length = (length_sums[positions] - length_sums[positions - window_size]) / window_size
+    after_length = (length_sums[positions + window_size] - length_sums[positions]) / window_size
+    before_vocab = (vocab_sums[positions] - vocab_sums[positions - window_size]) / window_size
+    after_vocab = (vocab_sums[positions + window_size] - vocab_sums[positions]) / window_size
+    
+    # A significant change in either statistic marks a boundary
+    length_change = np.abs(before_length - after_length) / np.maximum(np.maximum(before_length, after_length), 1)
+    vocab_change = np.abs(before_vocab - after_vocab) / np.maximum(np.maximum(before_vocab, after_vocab), 0.01)
+    
+    return positions[(length_change > 0.3) | (vocab_change > 0.3)]
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _find_boundaries(lengths, vocab_diversity, window_size):
+        # Same scan as the NumPy version, with running window sums
+        n = lengths.shape[0]
+        boundaries = np.empty(max(n - 2 * window_size, 0), dtype=np.int64)
+        count = 0
+        
+        before_length = 0
+        after_length = 0
+        before_vocab = 0.0
+        after_vocab = 0.0
+        for j in range(min(window_size, n)):
+            before_length += lengths[j]
+            before_vocab += vocab_diversity[j]
+        for j in range(window_size, min(2 * window_size, n)):
+            after_length += lengths[j]
+            after_vocab += vocab_diversity[j]
+        
+        for i in range(window_size, n - window_size):
+            if i > window_size:
+                # Slide both windows one sentence to the right
+                before_length += lengths[i - 1] - lengths[i - window_size - 1]
+                before_vocab += vocab_diversity[i - 1] - vocab_diversity[i - window_size - 1]
+                after_length += lengths[i + window_size - 1] - lengths[i - 1]
+                after_vocab += vocab_diversity[i + window_size - 1] - vocab_diversity[i - 1]
+            
+            mean_before_length = before_length / window_size
+            mean_after_length = after_length / window_size
+            mean_before_vocab = before_vocab / window_size
+            mean_after_vocab = after_vocab / window_size
+            
+            length_change = abs(mean_before_length - mean_after_length) / max(mean_before_length, mean_after_length, 1.0)
+            vocab_change = abs(mean_before_vocab - mean_after_vocab) / max(mean_before_vocab, mean_after_vocab, 0.01)
+            
+            if length_change > 0.3 or vocab_change > 0.3:
+                boundaries[count] = i
+                count += 1
+        
+        return boundaries[:count]
+
+
+# Chunking results are memoized on (text, parameters, pattern) so re-chunking
+# the same document (e.g. repeated ingest runs) skips the regex and stats
+# work. Results are cached as tuples; the chunker methods return list copies.
+
+@lru_cache(maxsize=256)
+def _chunk_by_sentences(text: str, sentences_per_chunk: int, sentence_re: re.Pattern) -> Tuple[str, ...]:
+    sentences = sentence_re.split(text.strip())
+    sentences = [s.strip() for s in sentences if s.strip()]
+    
+    # Sentences are non-empty, so every group yields a chunk
+    return tuple(
+        f"{'. '.join(sentences[i:i + sentences_per_chunk])}."
+        for i in range(0, len(sentences), sentences_per_chunk)
+    )
+
+
+@lru_cache(maxsize=256)
+def _chunk_by_paragraphs(text: str, paragraph_re: re.Pattern) -> Tuple[str, ...]:
+    paragraphs = paragraph_re.split(text.strip())
+    return tuple(p.strip() for p in paragraphs if p.strip())
+
+
+@lru_cache(maxsize=256)
+def _chunk_by_word_count(text: str, words_per_chunk: int, overlap: int) -> Tuple[str, ...]:
+    words = text.split()
+    chunks = []
+    
+    for i in range(0, len(words), words_per_chunk - overlap):
+        chunk_words = words[i:i + words_per_chunk]
+        if chunk_words:
+            chunks.append(' '.join(chunk_words))
+    
+    return tuple(chunks)
+
+
+@lru_cache(maxsize=256)
+def _chunk_by_statistical_boundaries(text: str, window_size: int, sentence_re: re.Pattern) -> Tuple[str, ...]:
+    sentences = sentence_re.split(text.strip())
+    sentences = [s.strip() for s in sentences if s.strip()]
+    
+    if len(sentences) <= window_size:
+        return (text,)
+    
+    # Per-sentence statistics as parallel arrays
+    lengths, vocab_diversity = zip(*map(_sentence_stats, sentences))
+    lengths = np.array(lengths, dtype=np.int64)
+    vocab_diversity = np.array(vocab_diversity, dtype=np.float64)
+    
+    boundaries = [0]
+    boundaries.extend(_find_boundaries(lengths, vocab_diversity, window_size).tolist())
+    boundaries.append(len(sentences))
+    
+    # Create chunks based on boundaries
+    chunks = []
+    for i in range(len(boundaries) - 1):
+        start = boundaries[i]
+        end = boundaries[i + 1]
+        chunk_sentences = sentences[start:end]
+        chunks.append('. '.join(chunk_sentences) + '.')
+    
+    return tuple(chunks)
 
 
 class StatisticalChunker:
@@ -19,98 +168,36 @@ class StatisticalChunker:
     def __init__(self):
         self.sentence_pattern = r'[.!?]+\s+'
         self.paragraph_pattern = r'\n\s*\n'
+        
+        # Compiled once so each chunking call skips the re module's pattern cache
+        self._sent_re = re.compile(self.sentence_pattern)
+        self._para_re = re.compile(self.paragraph_pattern)
+        self._sent_split_re = re.compile(r'[.!?]+')
     
     def chunk_by_sentences(self, text: str, sentences_per_chunk: int = 3) -> List[str]:
         """
         Chunk text by grouping sentences together.
         """
-        sentences = re.split(self.sentence_pattern, text.strip())
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        chunks = []
-        for i in range(0, len(sentences), sentences_per_chunk):
-            chunk = '. '.join(sentences[i:i + sentences_per_chunk])
-            if chunk:
-                chunks.append(chunk + '.')
-        
-        return chunks
+        return list(_chunk_by_sentences(text, sentences_per_chunk, self._sent_re))
     
     def chunk_by_paragraphs(self, text: str) -> List[str]:
         """
         Chunk text by natural paragraph breaks.
         """
-        paragraphs = re.split(self.paragraph_pattern, text.strip())
-        return [p.strip() for p in paragraphs if p.strip()]
+        return list(_chunk_by_paragraphs(text, self._para_re))
     
     def chunk_by_word_count(self, text: str, words_per_chunk: int = 50, overlap: int = 10) -> List[str]:
         """
         Chunk text based on word count with optional overlap.
         """
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), words_per_chunk - overlap):
-            chunk_words = words[i:i + words_per_chunk]
-            if chunk_words:
-                chunks.append(' '.join(chunk_words))
-        
-        return chunks
+        return list(_chunk_by_word_count(text, words_per_chunk, overlap))
     
     def chunk_by_statistical_boundaries(self, text: str, window_size: int = 5) -> List[str]:
         """
         Use statistical methods to find natural boundaries in text.
         Based on vocabulary changes and sentence length variations.
         """
-        sentences = re.split(r'[.!?]+', text.strip())
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        if len(sentences) <= window_size:
-            return [text]
-        
-        # Calculate statistics for each sentence
-        sentence_stats = []
-        for sentence in sentences:
-            words = sentence.split()
-            stats = {
-                'length': len(words),
-                'avg_word_length': np.mean([len(word) for word in words]) if words else 0,
-                'vocab_diversity': len(set(word.lower() for word in words)) / len(words) if words else 0
-            }
-            sentence_stats.append(stats)
-        
-        # Find boundary points based on statistical changes
-        boundaries = [0]
-        
-        for i in range(window_size, len(sentences) - window_size):
-            # Calculate statistics for windows before and after current position
-            before_window = sentence_stats[i-window_size:i]
-            after_window = sentence_stats[i:i+window_size]
-            
-            # Calculate means for each statistic
-            before_length = np.mean([s['length'] for s in before_window])
-            after_length = np.mean([s['length'] for s in after_window])
-            
-            before_vocab = np.mean([s['vocab_diversity'] for s in before_window])
-            after_vocab = np.mean([s['vocab_diversity'] for s in after_window])
-            
-            # If there's a significant change, mark as boundary
-            length_change = abs(before_length - after_length) / max(before_length, after_length, 1)
-            vocab_change = abs(before_vocab - after_vocab) / max(before_vocab, after_vocab, 0.01)
-            
-            if length_change > 0.3 or vocab_change > 0.3:
-                boundaries.append(i)
-        
-        boundaries.append(len(sentences))
-        
-        # Create chunks based on boundaries
-        chunks = []
-        for i in range(len(boundaries) - 1):
-            start = boundaries[i]
-            end = boundaries[i + 1]
-            chunk_sentences = sentences[start:end]
-            chunks.append('. '.join(chunk_sentences) + '.')
-        
-        return chunks
+        return list(_chunk_by_statistical_boundaries(text, window_size, self._sent_split_re))
     
     def get_chunk_statistics(self, chunks: List[str]) -> dict:
         """
@@ -119,18 +206,18 @@ class StatisticalChunker:
         if not chunks:
             return {}
         
-        word_counts = [len(chunk.split()) for chunk in chunks]
-        char_counts = [len(chunk) for chunk in chunks]
+        word_counts = np.fromiter((len(chunk.split()) for chunk in chunks), dtype=np.int64, count=len(chunks))
+        char_counts = np.fromiter((len(chunk) for chunk in chunks), dtype=np.int64, count=len(chunks))
         
         return {
             'num_chunks': len(chunks),
-            'avg_words_per_chunk': statistics.mean(word_counts),
-            'median_words_per_chunk': statistics.median(word_counts),
-            'std_words_per_chunk': statistics.stdev(word_counts) if len(word_counts) > 1 else 0,
-            'avg_chars_per_chunk': statistics.mean(char_counts),
-            'min_words': min(word_counts),
-            'max_words': max(word_counts),
-            'total_words': sum(word_counts)
+            'avg_words_per_chunk': word_counts.mean().item(),
+            'median_words_per_chunk': np.median(word_counts).item(),
+            'std_words_per_chunk': word_counts.std(ddof=1).item() if len(word_counts) > 1 else 0,
+            'avg_chars_per_chunk': char_counts.mean().item(),
+            'min_words': word_counts.min().item(),
+            'max_words': word_counts.max().item(),
+            'total_words': word_counts.sum().item()
         }
 
 
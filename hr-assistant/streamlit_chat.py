@@ -3,13 +3,15 @@
 
 import streamlit as st
 import requests
+import httpx
+import asyncio
 import json
+import random
+import threading
 import time
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
 
 # Import guardrails for client-side validation
 try:
@@ -18,6 +20,19 @@ try:
 except ImportError:
     GUARDRAILS_AVAILABLE = False
 
+# Faster JSON parsing for API responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+def _json(response) -> Any:
+    """Parse a requests or httpx response body with orjson when available."""
+    return _loads(response.content)
+
 # Page configuration
 st.set_page_config(
     page_title="HR Assistant Chat",
@@ -26,8 +41,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling. Streamlit removes any element that a rerun
+# does not emit again, so this must be sent every run; it is kept to the
+# classes the page actually uses.
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -35,26 +52,6 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .chat-container {
-        background-color: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        padding: 0.8rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        border-left: 4px solid #2196f3;
-    }
-    .assistant-message {
-        background-color: #f3e5f5;
-        padding: 0.8rem;
-        border-radius: 10px;
-        margin: 0.5rem 0;
-        border-left: 4px solid #9c27b0;
-    }
     .source-card {
         background-color: #fff3e0;
         padding: 0.5rem;
@@ -63,24 +60,302 @@ st.markdown("""
         border-left: 3px solid #ff9800;
         font-size: 0.9rem;
     }
-    .metrics-card {
-        background-color: #e8f5e8;
-        padding: 1rem;
-        border-radius: 8px;
-        text-align: center;
-    }
-    .sidebar-section {
-        background-color: #f5f5f5;
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-    }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Configuration
 RAG_API_URL = "http://localhost:8001"
 COMPREHENSIVE_API_URL = "http://localhost:8002"
+MAX_PROCESSING_TIMES = 200  # Response times kept for the performance panel
+STREAM_RAG_ANSWERS = True  # Use /ask/stream; set False for the cached blocking /ask path
+
+# Example questions and their (stable) button keys
+EXAMPLE_QUERIES = (
+    "What are the health insurance benefits?",
+    "Tell me about dependent care benefits",
+    "How does the performance review process work?",
+    "What is the company's acquisition strategy?",
+    "Tell me about salary bands",
+    "What confidential information is protected?"
+)
+_EXAMPLE_KEYS = tuple(f"main_example_{i}" for i in range(len(EXAMPLE_QUERIES)))
+_EXAMPLE_LABELS = tuple(f"💬 {q}" for q in EXAMPLE_QUERIES)
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Keep-alive connection pool shared by all sessions and reruns."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+    session.mount("http://", adapter)
+    return session
+
+def _parse_health(response) -> Dict[str, Any]:
+    """Turn a /health response (or the exception raised for it) into a status dict."""
+    if isinstance(response, Exception):
+        return {"status": "error", "error": str(response)}
+    if response.status_code == 200:
+        return {"status": "healthy", "data": _json(response)}
+    return {"status": "unhealthy", "error": f"HTTP {response.status_code}"}
+
+def _parse_stats(response) -> Dict[str, Any]:
+    """Turn a /stats response into the stats dict, empty on failure."""
+    if isinstance(response, Exception) or response.status_code != 200:
+        return {}
+    return _json(response)
+
+def _parse_guardrails(response) -> Dict[str, Any]:
+    """Turn a /guardrails/summary response into a status dict."""
+    if isinstance(response, Exception):
+        return {"status": "error"}
+    if response.status_code == 200:
+        return {"status": "ok", "data": _json(response).get("data", {})}
+    return {"status": "unavailable"}
+
+@st.cache_resource
+def get_backoff_state() -> Dict[str, Dict[str, float]]:
+    """Per-endpoint failure counts and retry times, shared by all sessions."""
+    return {}
+
+def _record_outcome(url: str, response) -> None:
+    """Reset an endpoint's backoff on success, or push its next retry out on failure."""
+    state = get_backoff_state()
+    if not isinstance(response, Exception):
+        state.pop(url, None)
+        return
+    entry = state.setdefault(url, {"failures": 0, "down_until": 0.0})
+    entry["down_until"] = time.time() + min(60, 2 ** entry["failures"]) + random.random()
+    entry["failures"] += 1
+
+async def _fetch_all(include_guardrails: bool) -> List[Any]:
+    """
+    GET the health, stats and guardrails endpoints concurrently.
+    
+    Endpoints that recently timed out or refused connections are skipped
+    (with exponential backoff plus jitter) so a down API cannot stall every rerun.
+    """
+    urls = [
+        f"{RAG_API_URL}/health",
+        f"{COMPREHENSIVE_API_URL}/health",
+        f"{RAG_API_URL}/stats",
+    ]
+    if include_guardrails:
+        urls.append(f"{COMPREHENSIVE_API_URL}/guardrails/summary?hours=24")
+    
+    state = get_backoff_state()
+    now = time.time()
+    down = {url for url in urls if now < state.get(url, {}).get("down_until", 0)}
+    
+    limits = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=5.0) as client:
+        fetched = await asyncio.gather(
+            *(client.get(url) for url in urls if url not in down),
+            return_exceptions=True
+        )
+    
+    fetched = iter(fetched)
+    responses = []
+    for url in urls:
+        if url in down:
+            retry_in = state[url]["down_until"] - now
+            responses.append(ConnectionError(f"API unreachable, retrying in {retry_in:.0f}s"))
+        else:
+            response = next(fetched)
+            _record_outcome(url, response)
+            responses.append(response)
+    return responses
+
+@st.cache_data(ttl=10, show_spinner=False)
+def get_sidebar_data(include_guardrails: bool) -> Dict[str, Any]:
+    """Fetch health, stats and guardrails data for the sidebar (cached for 10 seconds)."""
+    responses = asyncio.run(_fetch_all(include_guardrails))
+    data = {
+        "rag_health": _parse_health(responses[0]),
+        "comprehensive_health": _parse_health(responses[1]),
+        "stats": _parse_stats(responses[2]),
+    }
+    if include_guardrails:
+        data["guardrails"] = _parse_guardrails(responses[3])
+    return data
+
+class CacheCounters:
+    """Request, hit and miss counters for the cached API calls, safe to update from any thread."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "hits": 0, "misses": 0}
+    
+    def add(self, **deltas: int):
+        """Increment the named counters."""
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counts[name] += delta
+    
+    def snapshot(self) -> Dict[str, int]:
+        """Consistent copy of all counters."""
+        with self._lock:
+            return dict(self._counts)
+    
+    def reset(self):
+        """Set every counter back to zero."""
+        with self._lock:
+            self._counts.update(requests=0, hits=0, misses=0)
+
+@st.cache_resource
+def get_cache_counters() -> CacheCounters:
+    """Process-wide counters for the cached API calls."""
+    return CacheCounters()
+
+# Set by a cached fetch when its body actually runs, per calling thread, so a
+# caller can tell a cache hit from a miss without watching global counters
+_fetch_state = threading.local()
+
+def _record_miss():
+    """Mark the current call as an API round trip."""
+    _fetch_state.ran = True
+    get_cache_counters().add(misses=1)
+
+def _trim_sources(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the 200-char preview of each source before caching."""
+    for source in data.get("sources", []):
+        source['text_preview'] = (source.get('text_preview') or source.get('text') or '')[:200]
+        source.pop('text', None)
+    return data
+
+@st.cache_data(ttl=1800, max_entries=50, show_spinner=False)
+def fetch_rag_answer(query: str, max_sources: int = 5) -> Dict[str, Any]:
+    """
+    Ask the RAG API, sharing answers to repeated questions across sessions.
+    
+    Raises on any failure so that errors are never cached.
+    """
+    _record_miss()
+    payload = {
+        "query": query,
+        "max_sources": max_sources,
+        "include_sources": True,
+        "context_window": 3000
+    }
+    
+    response = get_http_session().post(f"{RAG_API_URL}/ask", json=payload, timeout=30)
+    response.raise_for_status()
+    return _trim_sources(_json(response))
+
+@st.cache_data(ttl=1800, max_entries=50, show_spinner=False)
+def fetch_chat_response(message: str, use_rag: bool, conversation_id: str) -> Dict[str, Any]:
+    """
+    Send a message to the comprehensive chat API, cached per conversation.
+    
+    Raises on any failure so that errors are never cached.
+    """
+    _record_miss()
+    payload = {
+        "message": message,
+        "conversation_id": conversation_id,
+        "use_rag": use_rag,
+        "max_sources": 5
+    }
+    
+    response = get_http_session().post(f"{COMPREHENSIVE_API_URL}/chat", json=payload, timeout=30)
+    response.raise_for_status()
+    return _trim_sources(_json(response))
+
+def stream_rag_answer(query: str, max_sources: int, result: Dict[str, Any]):
+    """
+    Stream the answer from the RAG API's /ask/stream endpoint.
+    
+    Yields answer text as it is generated; sources, timing and model
+    metadata are stored in ``result`` as their events arrive.
+    """
+    payload = {
+        "query": query,
+        "max_sources": max_sources,
+        "include_sources": True,
+        "context_window": 3000
+    }
+    
+    with get_http_session().post(f"{RAG_API_URL}/ask/stream", json=payload, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        
+        for line in response.iter_lines(chunk_size=None):
+            if not line.startswith(b"data: "):
+                continue
+            event = _loads(line[6:])
+            
+            if event["type"] == "token":
+                yield event["content"]
+            elif event["type"] == "sources":
+                result["sources"] = event["sources"]
+            elif event["type"] == "done":
+                result.update(event)
+            elif event["type"] == "error":
+                raise RuntimeError(event["error"])
+
+def _call_cached(fetch, *args) -> Dict[str, Any]:
+    """Run a cached fetch, reporting whether it was served from the cache."""
+    counters = get_cache_counters()
+    counters.add(requests=1)
+    _fetch_state.ran = False
+    try:
+        data = fetch(*args)
+    except requests.HTTPError as e:
+        return {"success": False, "error": f"HTTP {e.response.status_code}: {e.response.text}"}
+    except requests.exceptions.RequestException as e:
+        return {"success": False, "error": f"Request failed: {str(e)}"}
+    cached = not _fetch_state.ran
+    counters.add(hits=int(cached))
+    return {"success": True, "data": data, "cached": cached}
+
+@st.cache_resource
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Small background pool for warming the answer cache."""
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="prefetch")
+
+@st.cache_resource
+def get_prefetched_answers() -> Dict[tuple, float]:
+    """(query, max_sources) pairs warmed into the answer cache, with their times."""
+    return {}
+
+def is_prefetched(query: str, max_sources: int) -> bool:
+    """Whether a prefetched answer for this query should still be cached."""
+    return time.time() - get_prefetched_answers().get((query, max_sources), 0) < 1800
+
+def _prefetch_answer(query: str, max_sources: int):
+    """Populate the answer cache for one question, ignoring failures."""
+    try:
+        fetch_rag_answer(query, max_sources)
+    except requests.exceptions.RequestException:
+        return
+    get_prefetched_answers()[(query, max_sources)] = time.time()
+
+def prefetch_example_answers(max_sources: int):
+    """Answer the example questions in the background so first clicks hit the cache."""
+    executor = get_prefetch_executor()
+    for query in EXAMPLE_QUERIES:
+        if not is_prefetched(query, max_sources):
+            executor.submit(_prefetch_answer, query, max_sources)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_trend_figure(times: tuple):
+    """Build the response time trend chart (cached per series of times)."""
+    # Imported on first use: most sessions never open the chart
+    import pandas as pd
+    import plotly.express as px
+    
+    df = pd.DataFrame({
+        'Query': range(1, len(times) + 1),
+        'Response Time (ms)': times
+    })
+    
+    fig = px.line(
+        df, 
+        x='Query', 
+        y='Response Time (ms)',
+        title='Response Time Trend',
+        markers=True
+    )
+    fig.update_layout(height=300)
+    return fig
 
 class HRChatInterface:
     """HR Assistant Chat Interface for Streamlit."""
@@ -97,146 +372,54 @@ class HRChatInterface:
         if 'system_stats' not in st.session_state:
             st.session_state.system_stats = {}
         if 'processing_times' not in st.session_state:
-            st.session_state.processing_times = []
-        if 'query_cache' not in st.session_state:
-            st.session_state.query_cache = {}
-        if 'cache_hits' not in st.session_state:
-            st.session_state.cache_hits = 0
-        if 'cache_misses' not in st.session_state:
-            st.session_state.cache_misses = 0
+            st.session_state.processing_times = deque(maxlen=MAX_PROCESSING_TIMES)
+            st.session_state.processing_times_sum = 0.0
     
-    def normalize_query(self, query: str) -> str:
-        """Normalize query for cache key generation."""
-        return query.lower().strip().replace("?", "").replace(".", "")
+    def record_processing_time(self, processing_time: float):
+        """Append a response time, keeping a running sum over the bounded window."""
+        times = st.session_state.processing_times
+        if len(times) == times.maxlen:
+            st.session_state.processing_times_sum -= times[0]
+        st.session_state.processing_times_sum += processing_time
+        times.append(processing_time)
     
-    def get_cache_key(self, query: str, max_sources: int, use_rag: bool) -> str:
-        """Generate cache key for query."""
-        normalized = self.normalize_query(query)
-        return f"{normalized}|{max_sources}|{use_rag}"
-    
-    def check_cache(self, query: str, max_sources: int, use_rag: bool) -> Optional[Dict[str, Any]]:
-        """Check if query result is in cache."""
-        cache_key = self.get_cache_key(query, max_sources, use_rag)
-        
-        if cache_key in st.session_state.query_cache:
-            cached_data = st.session_state.query_cache[cache_key]
-            
-            # Check if cache entry is still fresh (within 30 minutes)
-            cache_time = cached_data.get('timestamp', 0)
-            if time.time() - cache_time < 1800:  # 30 minutes
-                st.session_state.cache_hits += 1
-                return cached_data
-            else:
-                # Remove expired cache entry
-                del st.session_state.query_cache[cache_key]
-        
-        st.session_state.cache_misses += 1
-        return None
-    
-    def update_cache(self, query: str, max_sources: int, use_rag: bool, result: Dict[str, Any]):
-        """Update cache with new query result."""
-        cache_key = self.get_cache_key(query, max_sources, use_rag)
-        
-        # Limit cache size to 50 entries
-        if len(st.session_state.query_cache) >= 50:
-            # Remove oldest entry
-            oldest_key = min(st.session_state.query_cache.keys(), 
-                           key=lambda k: st.session_state.query_cache[k].get('timestamp', 0))
-            del st.session_state.query_cache[oldest_key]
-        
-        # Add to cache with timestamp
-        cached_result = result.copy()
-        cached_result['timestamp'] = time.time()
-        cached_result['from_cache'] = True
-        st.session_state.query_cache[cache_key] = cached_result
-    
-    def check_api_health(self, api_url: str) -> Dict[str, Any]:
-        """Check if the API is healthy and accessible."""
-        try:
-            response = requests.get(f"{api_url}/health", timeout=5)
-            if response.status_code == 200:
-                return {"status": "healthy", "data": response.json()}
-            else:
-                return {"status": "unhealthy", "error": f"HTTP {response.status_code}"}
-        except requests.exceptions.RequestException as e:
-            return {"status": "error", "error": str(e)}
-    
-    def get_system_stats(self) -> Dict[str, Any]:
-        """Get system statistics from the API."""
-        try:
-            response = requests.get(f"{RAG_API_URL}/stats", timeout=5)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {}
-        except:
-            return {}
+    def fetch_sidebar_data(self) -> Dict[str, Any]:
+        """Fetch health, stats and guardrails data concurrently for the sidebar."""
+        return get_sidebar_data(GUARDRAILS_AVAILABLE)
     
     def send_rag_query(self, query: str, max_sources: int = 5) -> Dict[str, Any]:
         """Send query to RAG system and get response."""
-        try:
-            payload = {
-                "query": query,
-                "max_sources": max_sources,
-                "include_sources": True,
-                "context_window": 3000
-            }
-            
-            response = requests.post(
-                f"{RAG_API_URL}/ask",
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
-                
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "error": f"Request failed: {str(e)}"}
+        return _call_cached(fetch_rag_answer, query, max_sources)
     
     def send_chat_message(self, message: str, use_rag: bool = True) -> Dict[str, Any]:
         """Send message to comprehensive chat API."""
+        return _call_cached(fetch_chat_response, message, use_rag, st.session_state.conversation_id)
+    
+    def stream_rag_query(self, query: str, max_sources: int, placeholder) -> Dict[str, Any]:
+        """Stream the RAG answer into ``placeholder`` as tokens arrive."""
+        data = {}
+        parts = []
         try:
-            payload = {
-                "message": message,
-                "conversation_id": st.session_state.conversation_id,
-                "use_rag": use_rag,
-                "max_sources": 5
-            }
-            
-            response = requests.post(
-                f"{COMPREHENSIVE_API_URL}/chat",
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
-                
+            for chunk in stream_rag_answer(query, max_sources, data):
+                parts.append(chunk)
+                placeholder.markdown("".join(parts) + "▌")
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Request failed: {str(e)}"}
+        except RuntimeError as e:
+            return {"success": False, "error": str(e)}
+        
+        data["answer"] = "".join(parts)
+        placeholder.markdown(data["answer"])
+        return {"success": True, "data": _trim_sources(data), "cached": False}
     
     def display_message(self, role: str, content: str, sources: Optional[List[Dict]] = None, 
                        processing_time: Optional[float] = None, model_used: Optional[str] = None):
-        """Display a chat message with styling."""
-        if role == "user":
-            st.markdown(f"""
-            <div class="user-message">
-                <strong>👤 You:</strong><br>
-                {content}
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="assistant-message">
-                <strong>🤖 HR Assistant:</strong><br>
-                {content}
-            </div>
-            """, unsafe_allow_html=True)
+        """Display a chat message using Streamlit's native chat elements."""
+        with st.chat_message(role, avatar="👤" if role == "user" else "🤖"):
+            st.markdown(content)
+            
+            if role == "user":
+                return
             
             # Display metadata if available
             if processing_time or model_used:
@@ -256,7 +439,7 @@ class HRChatInterface:
                         <div class="source-card">
                             <strong>📄 {source.get('title', 'Unknown Document')}</strong> 
                             (Relevance: {source.get('similarity_score', 0):.3f})<br>
-                            <small>{source.get('text_preview', source.get('text', ''))[:200]}...</small>
+                            <small>{source['text_preview']}...</small>
                         </div>
                         """, unsafe_allow_html=True)
     
@@ -266,9 +449,10 @@ class HRChatInterface:
             st.markdown("## 🏢 HR Assistant")
             st.markdown("### System Status")
             
-            # Check API health
-            rag_health = self.check_api_health(RAG_API_URL)
-            comprehensive_health = self.check_api_health(COMPREHENSIVE_API_URL)
+            # Check API health (all sidebar requests run in parallel)
+            sidebar_data = self.fetch_sidebar_data()
+            rag_health = sidebar_data["rag_health"]
+            comprehensive_health = sidebar_data["comprehensive_health"]
             
             # Display health status
             if rag_health["status"] == "healthy":
@@ -285,7 +469,7 @@ class HRChatInterface:
             
             # System statistics
             st.markdown("### 📊 System Stats")
-            stats = self.get_system_stats()
+            stats = sidebar_data["stats"]
             
             if stats:
                 if 'database' in stats:
@@ -324,25 +508,23 @@ class HRChatInterface:
             # Guardrails monitoring
             if GUARDRAILS_AVAILABLE:
                 st.markdown("### 🛡️ Content Protection")
-                try:
-                    # Get violations summary
-                    response = requests.get(f"{COMPREHENSIVE_API_URL}/guardrails/summary?hours=24", timeout=5)
-                    if response.status_code == 200:
-                        violations_data = response.json().get("data", {})
-                        total_violations = violations_data.get("total_violations", 0)
+                guardrails = sidebar_data["guardrails"]
+                if guardrails["status"] == "ok":
+                    violations_data = guardrails["data"]
+                    total_violations = violations_data.get("total_violations", 0)
+                    
+                    if total_violations > 0:
+                        st.warning(f"⚠️ {total_violations} violations (24h)")
                         
-                        if total_violations > 0:
-                            st.warning(f"⚠️ {total_violations} violations (24h)")
-                            
-                            # Show breakdown
-                            by_type = violations_data.get("by_type", {})
-                            for vtype, count in by_type.items():
-                                st.caption(f"• {vtype.replace('_', ' ').title()}: {count}")
-                        else:
-                            st.success("✅ No violations (24h)")
+                        # Show breakdown
+                        by_type = violations_data.get("by_type", {})
+                        for vtype, count in by_type.items():
+                            st.caption(f"• {vtype.replace('_', ' ').title()}: {count}")
                     else:
-                        st.info("📊 Violations data unavailable")
-                except:
+                        st.success("✅ No violations (24h)")
+                elif guardrails["status"] == "unavailable":
+                    st.info("📊 Violations data unavailable")
+                else:
                     st.caption("🛡️ Guardrails monitoring active")
             else:
                 st.warning("⚠️ Guardrails unavailable")
@@ -352,24 +534,27 @@ class HRChatInterface:
             # Cache management
             st.markdown("### ⚡ Memory Cache")
             
-            total_queries = st.session_state.cache_hits + st.session_state.cache_misses
+            counters = get_cache_counters().snapshot()
+            total_queries = counters["requests"]
             if total_queries > 0:
-                cache_hit_rate = (st.session_state.cache_hits / total_queries * 100)
+                cache_hits = counters["hits"]
+                cache_hit_rate = (cache_hits / total_queries * 100)
                 st.metric("Hit Rate", f"{cache_hit_rate:.1f}%")
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Cached", len(st.session_state.query_cache))
+                    st.metric("API Calls", counters["misses"])
                 with col2:
-                    st.metric("Hits", st.session_state.cache_hits)
+                    st.metric("Hits", cache_hits)
             else:
                 st.info("No queries processed yet")
             
             # Clear cache button
             if st.button("🗑️ Clear Cache", help="Clear query cache to free memory"):
-                st.session_state.query_cache = {}
-                st.session_state.cache_hits = 0
-                st.session_state.cache_misses = 0
+                fetch_rag_answer.clear()
+                fetch_chat_response.clear()
+                get_prefetched_answers().clear()
+                get_cache_counters().reset()
                 st.success("Cache cleared!")
                 st.rerun()
             
@@ -379,10 +564,8 @@ class HRChatInterface:
             if st.button("🗑️ Clear Chat", type="secondary"):
                 st.session_state.messages = []
                 st.session_state.conversation_id = f"chat_{int(time.time())}"
-                st.session_state.processing_times = []
-                st.session_state.query_cache = {}
-                st.session_state.cache_hits = 0
-                st.session_state.cache_misses = 0
+                st.session_state.processing_times = deque(maxlen=MAX_PROCESSING_TIMES)
+                st.session_state.processing_times_sum = 0.0
                 st.rerun()
             
             return max_sources, use_rag
@@ -392,18 +575,20 @@ class HRChatInterface:
         st.markdown("### 📈 Performance Metrics")
         
         # Cache statistics
-        total_queries = st.session_state.cache_hits + st.session_state.cache_misses
-        cache_hit_rate = (st.session_state.cache_hits / total_queries * 100) if total_queries > 0 else 0
+        counters = get_cache_counters().snapshot()
+        total_queries = counters["requests"]
+        cache_hits = counters["hits"]
+        cache_hit_rate = (cache_hits / total_queries * 100) if total_queries > 0 else 0
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.metric("Cache Hit Rate", f"{cache_hit_rate:.1f}%", 
-                     delta=f"{st.session_state.cache_hits} hits")
+                     delta=f"{cache_hits} hits")
         
         with col2:
-            st.metric("Cached Queries", len(st.session_state.query_cache),
-                     delta=f"Max: 50")
+            st.metric("API Calls", counters["misses"],
+                     delta=f"Max cached: 50")
         
         with col3:
             st.metric("Total Queries", total_queries)
@@ -416,7 +601,7 @@ class HRChatInterface:
             times = st.session_state.processing_times
             
             with col1:
-                avg_time = sum(times) / len(times)
+                avg_time = st.session_state.processing_times_sum / len(times)
                 st.metric("Avg Response Time", f"{avg_time:.1f}ms")
             
             with col2:
@@ -427,22 +612,9 @@ class HRChatInterface:
                 max_time = max(times)
                 st.metric("Slowest Response", f"{max_time:.1f}ms")
             
-            # Response time chart
-            if len(times) > 1:
-                df = pd.DataFrame({
-                    'Query': range(1, len(times) + 1),
-                    'Response Time (ms)': times
-                })
-                
-                fig = px.line(
-                    df, 
-                    x='Query', 
-                    y='Response Time (ms)',
-                    title='Response Time Trend',
-                    markers=True
-                )
-                fig.update_layout(height=300)
-                st.plotly_chart(fig, use_container_width=True)
+            # Response time chart (only built and sent when requested)
+            if len(times) > 1 and st.checkbox("📈 Show response time trend", key="show_trend"):
+                st.plotly_chart(build_trend_figure(tuple(times)), use_container_width=True)
     
     def main_chat_interface(self):
         """Main chat interface."""
@@ -451,6 +623,11 @@ class HRChatInterface:
         # Sidebar
         max_sources, use_rag = self.display_sidebar()
         
+        # Warm the answer cache for the example questions once per session
+        if use_rag and not st.session_state.get('_prefetched'):
+            prefetch_example_answers(max_sources)
+            st.session_state._prefetched = True
+        
         # Main chat area
         col1, col2 = st.columns([2, 1])
         
@@ -470,55 +647,26 @@ class HRChatInterface:
                         model_used=message.get("model_used")
                     )
             
-            # Chat input
-            st.markdown("---")
-            
-            # Handle example query
-            query = ""
-            auto_send = False
-            
-            if hasattr(st.session_state, 'example_query'):
-                query = st.session_state.example_query
-                auto_send = True
-                del st.session_state.example_query
-            else:
-                query = st.text_input(
-                    "Ask a question about HR policies, benefits, or procedures:",
-                    placeholder="e.g., What are the health insurance options?",
-                    key="chat_input"
-                )
-            
-            # Send button
-            col_send, col_clear = st.columns([3, 1])
-            
-            with col_send:
-                send_button = st.button("🚀 Send", type="primary", use_container_width=True)
+            # Chat input (an example question click takes precedence)
+            prompt = st.chat_input("Ask a question about HR policies, benefits, or procedures...")
+            query = st.session_state.pop("example_query", None) or prompt
             
             # Example questions below the chat input
     
             st.markdown(" 💡 Click any question below to use it:")
             
-            example_queries = [
-                "What are the health insurance benefits?",
-                "Tell me about dependent care benefits",
-                "How does the performance review process work?",
-                "What is the company's acquisition strategy?",
-                "Tell me about salary bands",
-                "What confidential information is protected?"
-            ]
-            
             # Create columns for example questions (2 per row)
             cols = st.columns(2)
-            for i, example_query in enumerate(example_queries):
-                with cols[i % 2]:
-                    if st.button(f"💬 {example_query}", key=f"main_example_{hash(example_query)}", use_container_width=True):
+            for i, example_query in enumerate(EXAMPLE_QUERIES):
+                with cols[i & 1]:
+                    if st.button(_EXAMPLE_LABELS[i], key=_EXAMPLE_KEYS[i], use_container_width=True):
                         st.session_state.example_query = example_query
                         st.rerun()
             
             st.markdown("---")
             
-            # Process query if send button clicked or example query selected
-            if (send_button and query) or (auto_send and query):
+            # Process query if submitted or example query selected
+            if query:
                 # Client-side guardrails validation
                 if GUARDRAILS_AVAILABLE:
                     is_allowed, violations = validate_query(query)
@@ -534,72 +682,54 @@ class HRChatInterface:
                 user_message = {
                     "role": "user",
                     "content": query,
-                    "timestamp": datetime.now()
+                    "timestamp": time.time()
                 }
                 st.session_state.messages.append(user_message)
                 
-                # Show user message immediately
-                self.display_message("user", query)
-                
-                # Check cache first
-                cached_result = self.check_cache(query, max_sources, use_rag)
+                # Show user message immediately, below the existing history
+                with chat_container:
+                    self.display_message("user", query)
                 
-                if cached_result:
-                    # Use cached result
-                    st.info("⚡ Retrieved from cache for faster response")
-                    data = cached_result
-                    
-                    # Extract response data from cache
-                    if use_rag:
-                        answer = data["answer"]
-                        sources = data.get("sources", [])
-                        processing_time = 5  # Cached responses are super fast
-                        model_used = data.get("model_used", "Cached")
-                    else:
-                        answer = data["response"]
-                        sources = data.get("sources", [])
-                        processing_time = 5
-                        model_used = "Cached"
-                    
+                # Prefetched answers are served from the cache instead of re-streamed
+                streamed = use_rag and STREAM_RAG_ANSWERS and not is_prefetched(query, max_sources)
+                if streamed:
+                    # Render tokens as they are generated
+                    with chat_container, st.chat_message("assistant", avatar="🤖"):
+                        result = self.stream_rag_query(query, max_sources, st.empty())
                 else:
-                    # Show loading indicator for new queries
+                    # Show loading indicator (cached answers return immediately)
                     with st.spinner("🤖 HR Assistant is thinking..."):
                         # Send to appropriate API based on settings
                         if use_rag:
                             result = self.send_rag_query(query, max_sources)
                         else:
                             result = self.send_chat_message(query, use_rag=False)
-                        
-                        if result["success"]:
-                            data = result["data"]
-                            
-                            # Cache the result for future use
-                            self.update_cache(query, max_sources, use_rag, data)
-                            
-                            # Extract response data based on API used
-                            if use_rag:
-                                answer = data["answer"]
-                                sources = data.get("sources", [])
-                                processing_time = data.get("processing_time_ms", 0)
-                                model_used = data.get("model_used", "Unknown")
-                            else:
-                                answer = data["response"]
-                                sources = data.get("sources", [])
-                                processing_time = data.get("processing_time_ms", 0)
-                                model_used = data.get("model_used", "Unknown")
-                        else:
-                            # Handle API error
-                            error_message = f"❌ Error: {result['error']}"
-                            st.error(error_message)
-                            
-                            # Add error message to chat
-                            error_msg = {
-                                "role": "assistant",
-                                "content": error_message,
-                                "timestamp": datetime.now()
-                            }
-                            st.session_state.messages.append(error_msg)
-                            return
+                
+                if not result["success"]:
+                    # Handle API error
+                    error_message = f"❌ Error: {result['error']}"
+                    st.error(error_message)
+                    
+                    # Add error message to chat
+                    error_msg = {
+                        "role": "assistant",
+                        "content": error_message,
+                        "timestamp": time.time()
+                    }
+                    st.session_state.messages.append(error_msg)
+                    return
+                
+                data = result["data"]
+                answer = data["answer"] if use_rag else data["response"]
+                sources = data.get("sources", [])
+                
+                if result["cached"]:
+                    st.info("⚡ Retrieved from cache for faster response")
+                    processing_time = 5  # Cached responses are super fast
+                    model_used = data.get("model_used", "Cached") if use_rag else "Cached"
+                else:
+                    processing_time = data.get("processing_time_ms", 0)
+                    model_used = data.get("model_used", "Unknown")
                 
                 # Add assistant message (works for both cached and fresh results)
                 assistant_message = {
@@ -608,24 +738,24 @@ class HRChatInterface:
                     "sources": sources,
                     "processing_time": processing_time,
                     "model_used": model_used,
-                    "timestamp": datetime.now()
+                    "timestamp": time.time()
                 }
                 st.session_state.messages.append(assistant_message)
                 
                 # Track performance
-                st.session_state.processing_times.append(processing_time)
-                
-                # Display assistant response
-                self.display_message(
-                    "assistant", 
-                    answer, 
-                    sources, 
-                    processing_time, 
-                    model_used
-                )
+                self.record_processing_time(processing_time)
                 
-                # Clear input and rerun
-                st.rerun()
+                # Display assistant response once (a streamed answer is already on screen);
+                # no st.rerun() is needed, the history loop picks both turns up next run
+                if not streamed:
+                    with chat_container:
+                        self.display_message(
+                            "assistant", 
+                            answer, 
+                            sources, 
+                            processing_time, 
+                            model_used
+                        )
         
         with col2:
             # Performance metrics
@@ -6,13 +6,16 @@ Tests the guardrails system against salary, acquisition, and confidential inform
 
 import sys
 import os
+import io
+from contextlib import redirect_stdout
+from itertools import chain
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-from guardrails import validate_query, validate_response, get_violations_summary
+from guardrails import HRGuardrails, validate_query, validate_response_many, get_violations_summary, warmup
 
 def test_sensitive_queries():
     """Test queries that might access sensitive information"""
@@ -54,31 +57,79 @@ def test_sensitive_queries():
             for v in violations:
                 print(f"    - {v.violation_type.value}: {v.message}")
 
-def test_sensitive_responses():
+# Responses that contain sensitive information from our sample data
+SENSITIVE_RESPONSES = [
+    "The CEO's base salary is $450,000 plus a 40% bonus potential.",
+    "The acquisition of TechFlow Solutions was valued at $127 million.",
+    "John Smith has a performance rating of 4.2/5 and earns $132,000.",
+    "This confidential document contains trade secret compensation data.",
+    "Internal only information shows the CFO earns $275,000 annually.",
+    "The disciplinary action resulted in termination and $15,384 severance.",
+    "Board discussions revealed executive compensation philosophy changes.",
+    "Performance improvement plans affect 15% of our workforce.",
+    "The acquisition timeline is highly confidential and proprietary.",
+    "Salary bands range from $75,000 to $160,000 for management roles."
+]
+
+# Keywords that should trigger confidential information detection
+CONFIDENTIAL_TERMS = [
+    "salary", "compensation", "bonus", "acquisition", "merger",
+    "confidential", "internal only", "trade secret", "proprietary",
+    "termination", "disciplinary", "performance rating", "lawsuit",
+    "board", "executive", "severance", "investigation"
+]
+
+# Responses that should get disclaimers
+SENSITIVE_TOPICS = [
+    "Employee salaries vary based on performance and experience.",
+    "Disciplinary actions follow our progressive discipline policy.",
+    "Termination procedures require manager and HR approval.",
+    "Legal matters should be handled through proper channels.",
+    "Medical information is protected under HIPAA regulations.",
+    "Discrimination complaints are investigated thoroughly."
+]
+
+def test_response_validation():
+    """Validate all sample responses in one batched pass, then report each section"""
+    keyword_responses = [f"The document contains {term} information that is sensitive." for term in CONFIDENTIAL_TERMS]
+    corpus = list(chain(SENSITIVE_RESPONSES, keyword_responses, SENSITIVE_TOPICS))
+    results = validate_response_many(corpus, "HR question", "test_user")
+    
+    keywords_start = len(SENSITIVE_RESPONSES)
+    topics_start = keywords_start + len(keyword_responses)
+    _report_sensitive_responses(results[:keywords_start])
+    _report_confidential_keywords(results[keywords_start:topics_start])
+    _report_disclaimer_addition(results[topics_start:])
+
+def test_batched_matches_single():
+    """validate_response_many must agree with validate_response call for call"""
+    # Fresh instance so the comparison does not add to the reported violation log
+    guardrails = HRGuardrails()
+    keyword_responses = [f"The document contains {term} information that is sensitive." for term in CONFIDENTIAL_TERMS]
+    corpus = list(chain(
+        SENSITIVE_RESPONSES, keyword_responses, SENSITIVE_TOPICS,
+        ["", "Contact jane.doe@company.com or call 555-123-4567.", "SSN 123-45-6789, card 4111-1111-1111-1111.",
+         "CONFIDENTIAL: Board approved the MERGER.", "Plain answer about PTO accrual."]
+    ))
+    
+    def comparable(result):
+        filtered_response, violations = result
+        return filtered_response, [(v.violation_type, v.risk_level, v.message, v.details, v.user_id, v.query)
+                                   for v in violations]
+    
+    batched = [comparable(r) for r in guardrails.validate_response_many(corpus, "HR question", "test_user")]
+    single = [comparable(guardrails.validate_response(r, "HR question", "test_user")) for r in corpus]
+    assert batched == single, "validate_response_many disagrees with validate_response"
+    print(f"\n✅ Batched validation matches per-response validation ({len(corpus)} responses)")
+
+def _report_sensitive_responses(results):
     """Test response filtering for sensitive information"""
     print("\n\n🛡️ Testing Response Filtering for Sensitive Content")
     print("=" * 60)
     
-    # Responses that contain sensitive information from our sample data
-    sensitive_responses = [
-        "The CEO's base salary is $450,000 plus a 40% bonus potential.",
-        "The acquisition of TechFlow Solutions was valued at $127 million.",
-        "John Smith has a performance rating of 4.2/5 and earns $132,000.",
-        "This confidential document contains trade secret compensation data.",
-        "Internal only information shows the CFO earns $275,000 annually.",
-        "The disciplinary action resulted in termination and $15,384 severance.",
-        "Board discussions revealed executive compensation philosophy changes.",
-        "Performance improvement plans affect 15% of our workforce.",
-        "The acquisition timeline is highly confidential and proprietary.",
-        "Salary bands range from $75,000 to $160,000 for management roles."
-    ]
-    
-    for i, response in enumerate(sensitive_responses):
+    for i, (response, (filtered_response, violations)) in enumerate(zip(SENSITIVE_RESPONSES, results)):
         print(f"\nTest {i+1}: {response[:60]}...")
         
-        # Test response filtering
-        filtered_response, violations = validate_response(response, "salary question", "test_user")
-        
         # Show violations detected
         if violations:
             print(f"  🚨 Violations: {len(violations)}")
@@ -97,47 +148,24 @@ def test_sensitive_responses():
         else:
             print("  📝 Response unchanged")
 
-def test_confidential_keywords():
+def _report_confidential_keywords(results):
     """Test detection of confidential keywords from our sample data"""
     print("\n\n🔒 Testing Confidential Keyword Detection")
     print("=" * 50)
     
-    # Keywords that should trigger confidential information detection
-    confidential_terms = [
-        "salary", "compensation", "bonus", "acquisition", "merger",
-        "confidential", "internal only", "trade secret", "proprietary",
-        "termination", "disciplinary", "performance rating", "lawsuit",
-        "board", "executive", "severance", "investigation"
-    ]
-    
-    for term in confidential_terms:
-        test_response = f"The document contains {term} information that is sensitive."
-        filtered_response, violations = validate_response(test_response, "test query")
-        
+    for term, (filtered_response, violations) in zip(CONFIDENTIAL_TERMS, results):
         if violations:
             violation_types = [v.violation_type.value for v in violations]
             print(f"  🚨 '{term}' → Detected: {violation_types}")
         else:
             print(f"  ✅ '{term}' → Not flagged")
 
-def test_disclaimer_addition():
+def _report_disclaimer_addition(results):
     """Test automatic disclaimer addition for sensitive topics"""
     print("\n\n⚠️ Testing Automatic Disclaimer Addition")
     print("=" * 45)
     
-    # Responses that should get disclaimers
-    sensitive_topics = [
-        "Employee salaries vary based on performance and experience.",
-        "Disciplinary actions follow our progressive discipline policy.",
-        "Termination procedures require manager and HR approval.",
-        "Legal matters should be handled through proper channels.",
-        "Medical information is protected under HIPAA regulations.",
-        "Discrimination complaints are investigated thoroughly."
-    ]
-    
-    for topic in sensitive_topics:
-        filtered_response, violations = validate_response(topic, "HR question")
-        
+    for topic, (filtered_response, violations) in zip(SENSITIVE_TOPICS, results):
         has_disclaimer = "⚠️ **Disclaimer**" in filtered_response
         print(f"  {'📋' if has_disclaimer else '📝'} Disclaimer {'Added' if has_disclaimer else 'Not Added'}: {topic[:50]}...")
         
@@ -165,16 +193,29 @@ def show_violations_summary():
             print(f"  • {risk.title()}: {count}")
 
 def main():
-    """Run comprehensive guardrails testing"""
+    """Run comprehensive guardrails testing, writing the report in one go (or not at all with -q)"""
+    # Pay one-time matcher setup outside the tests
+    warmup()
+    
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            run_tests()
+    finally:
+        if "-q" not in sys.argv[1:]:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+def run_tests():
+    """Run all guardrails tests and print the report"""
     print("🛡️ HR Assistant Guardrails Comprehensive Testing")
     print("🎯 Testing with Salary, Acquisition & Confidential Data")
     print("=" * 70)
     
     # Run all tests
     test_sensitive_queries()
-    test_sensitive_responses()
-    test_confidential_keywords()
-    test_disclaimer_addition()
+    test_response_validation()
+    test_batched_matches_single()
     show_violations_summary()
     
     print("\n" + "=" * 70)
@@ -6,7 +6,28 @@ Validates that all components can be imported and initialized correctly.
 
 import sys
 import os
-from pathlib import Path
+import importlib
+from importlib.metadata import distributions
+
+# Core dependencies as (display name, distribution/import name)
+CORE_DEPENDENCIES = [
+    ("FastAPI", "fastapi"),
+    ("OpenAI", "openai"),
+    ("PyMongo", "pymongo"),
+    ("Streamlit", "streamlit"),
+]
+
+# Any of the user, group or other execute permission bits
+EXECUTE_BITS = 0o111
+
+def installed_versions():
+    """Map installed distribution names (lower-case) to versions in one metadata scan."""
+    versions = {}
+    for dist in distributions():
+        name = dist.metadata["Name"]
+        if name:
+            versions.setdefault(name.lower(), dist.version)
+    return versions
 
 def validate_environment():
     """Validate virtual environment and dependencies."""
@@ -23,34 +44,18 @@ def validate_environment():
     else:
         print("⚠️  Not running in virtual environment")
     
-    # Check core dependencies
-    try:
-        import fastapi
-        print(f"✅ FastAPI: {fastapi.__version__}")
-    except ImportError:
-        print("❌ FastAPI not available")
-        return False
-    
-    try:
-        import openai
-        print(f"✅ OpenAI: {openai.__version__}")
-    except ImportError:
-        print("❌ OpenAI not available")
-        return False
-    
-    try:
-        import pymongo
-        print(f"✅ PyMongo: {pymongo.__version__}")
-    except ImportError:
-        print("❌ PyMongo not available")
-        return False
-    
-    try:
-        import streamlit
-        print(f"✅ Streamlit: {streamlit.__version__}")
-    except ImportError:
-        print("❌ Streamlit not available")
-        return False
+    # Check core dependencies (read from package metadata, without importing them)
+    versions = installed_versions()
+    for label, package in CORE_DEPENDENCIES:
+        version = versions.get(package)
+        if version is None:
+            # Not in the metadata (e.g. a source checkout on sys.path): try importing it
+            try:
+                version = importlib.import_module(package).__version__
+            except ImportError:
+                print(f"❌ {label} not available")
+                return False
+        print(f"✅ {label}: {version}")
     
     # Check file structure
     required_files = [
@@ -61,9 +66,12 @@ def validate_environment():
         "requirements_basic.txt"
     ]
     
+    # One directory read serves every file and script check below
+    entries = {entry.name: entry for entry in os.scandir(".")}
+    
     print("\n📁 Checking file structure...")
     for file in required_files:
-        if Path(file).exists():
+        if file in entries:
             print(f"✅ {file}")
         else:
             print(f"❌ {file} missing")
@@ -79,9 +87,10 @@ def validate_environment():
     
     print("\n🚀 Checking startup scripts...")
     for script in startup_scripts:
-        script_path = Path(script)
-        if script_path.exists():
-            if os.access(script_path, os.X_OK):
+        entry = entries.get(script)
+        if entry is not None:
+            # One lstat per script; any of the user/group/other execute bits counts
+            if entry.stat(follow_symlinks=False).st_mode & EXECUTE_BITS:
                 print(f"✅ {script} (executable)")
             else:
                 print(f"⚠️  {script} (not executable)")
@@ -90,7 +99,7 @@ def validate_environment():
             return False
     
     # Check environment file
-    if Path(".env").exists():
+    if ".env" in entries:
         print("✅ .env file exists")
         
         # Basic env validation
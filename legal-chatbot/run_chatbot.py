@@ -4,14 +4,26 @@ Legal Chatbot Startup Script (Python Version)
 This script starts both the backend RAG API and the Angular frontend
 """
 
+import asyncio
+import hashlib
 import subprocess
 import time
 import signal
 import sys
-import os
 import socket
+import threading
+import venv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# Optional psutil for terminating only our own process trees
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 class Colors:
     RED = '\033[0;31m'
     GREEN = '\033[0;32m'
@@ -23,63 +35,128 @@ class ChatbotLauncher:
     def __init__(self):
         self.backend_process = None
         self.frontend_process = None
+        self.frontend_stdout = deque(maxlen=200)
+        self.frontend_stderr = deque(maxlen=200)
         self.root_dir = Path(__file__).parent
         
     def print_colored(self, message, color=Colors.NC):
         print(f"{color}{message}{Colors.NC}")
         
-    def check_port(self, port):
-        """Check if a port is in use"""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            result = sock.connect_ex(('localhost', port))
-            return result == 0
+    @staticmethod
+    def _pump(stream, buffer):
+        """Drain a child's pipe so it never blocks, keeping the last lines for error reports"""
+        for line in iter(stream.readline, b''):
+            buffer.append(line)
+        stream.close()
+        
+    async def check_port(self, addresses):
+        """Check if a port is in use with a non-blocking connect on the event loop's selector"""
+        loop = asyncio.get_running_loop()
+        for family, address in addresses:
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.setblocking(False)
+                try:
+                    await asyncio.wait_for(loop.sock_connect(sock, address), timeout=0.25)
+                    return True
+                except (OSError, asyncio.TimeoutError):
+                    continue
+        return False
             
-    def wait_for_service(self, port, service_name, max_attempts=60):
-        """Wait for a service to start on the specified port"""
+    async def wait_for_service(self, port, service_name, timeout=180, progress_every=15):
+        """Wait for a service to accept connections on the specified port"""
         self.print_colored(f"Waiting for {service_name} to start on port {port}...", Colors.YELLOW)
         
-        for attempt in range(1, max_attempts + 1):
-            # Check if the process is still running (for frontend)
-            if service_name == "Frontend Server" and self.frontend_process:
-                if self.frontend_process.poll() is not None:
-                    self.print_colored("❌ Angular process has exited unexpectedly", Colors.RED)
-                    return False
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_progress = start + progress_every
+        delay = 0.025
+        
+        # Resolve localhost once (IPv4 and/or IPv6) rather than on every attempt
+        addresses = [
+            (family, address)
+            for family, _, _, _, address in await loop.getaddrinfo("localhost", port, type=socket.SOCK_STREAM)
+        ]
+        
+        # Process behind the service, polled so a crash at startup ends the wait early
+        process = {"Backend API": self.backend_process, "Frontend Server": self.frontend_process}.get(service_name)
+        
+        while loop.time() - start < timeout:
+            # Check if the process is still running
+            if process and process.poll() is not None:
+                label = "Angular" if service_name == "Frontend Server" else service_name
+                self.print_colored(f"❌ {label} process has exited unexpectedly", Colors.RED)
+                return False
             
-            if self.check_port(port):
+            if await self.check_port(addresses):
                 self.print_colored(f"✅ {service_name} is running on port {port}", Colors.GREEN)
                 return True
             
-            # Show progress every 5 attempts for frontend (which takes longer)
-            if service_name == "Frontend Server" and attempt % 5 == 0:
-                self.print_colored(f"⏳ Attempt {attempt}/{max_attempts} - Angular is building, please wait...", Colors.YELLOW)
-            elif service_name != "Frontend Server":
-                self.print_colored(f"Attempt {attempt}/{max_attempts} - waiting for {service_name}...", Colors.YELLOW)
+            # Show progress periodically (Angular's first build takes longer)
+            if loop.time() >= next_progress:
+                elapsed = int(loop.time() - start)
+                if service_name == "Frontend Server":
+                    self.print_colored(f"⏳ {elapsed}s - Angular is building, please wait...", Colors.YELLOW)
+                else:
+                    self.print_colored(f"{elapsed}s - waiting for {service_name}...", Colors.YELLOW)
+                next_progress += progress_every
             
-            time.sleep(3)  # Increased wait time for better stability
+            # Exponential backoff: 25ms up to 400ms between connection attempts,
+            # cut short by SIGCHLD so a crashed child is noticed immediately
+            try:
+                await asyncio.wait_for(self.child_exited.wait(), timeout=delay)
+                self.child_exited.clear()
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, 0.4)
             
         self.print_colored(f"❌ Failed to start {service_name} on port {port}", Colors.RED)
         return False
         
+    def terminate_tree(self, process):
+        """Terminate a launched process and every process it spawned"""
+        # Collect descendants first; once the parent exits they are re-parented
+        children = []
+        if PSUTIL_AVAILABLE:
+            try:
+                children = psutil.Process(process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                pass
+        
+        # Give the process 5 seconds to exit cleanly before escalating to SIGKILL
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait(timeout=2)
+        
+        for child in children:
+            try:
+                child.terminate()
+            except psutil.NoSuchProcess:
+                pass
+        _, alive = psutil.wait_procs(children, timeout=2) if children else ([], [])
+        for child in alive:
+            child.kill()
+        
     def cleanup(self, signum=None, frame=None):
         """Cleanup background processes"""
         self.print_colored("\n🛑 Shutting down services...", Colors.YELLOW)
         
-        if self.backend_process:
-            self.backend_process.terminate()
-            self.backend_process.wait()
-            self.print_colored("✅ Backend API stopped", Colors.GREEN)
+        # Stop both services concurrently, reporting each as it finishes
+        services = [(self.backend_process, "Backend API"), (self.frontend_process, "Frontend server")]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {executor.submit(self.terminate_tree, process): name for process, name in services if process}
+            for future in as_completed(futures):
+                self.print_colored(f"✅ {futures[future]} stopped", Colors.GREEN)
             
-        if self.frontend_process:
-            self.frontend_process.terminate()
-            self.frontend_process.wait()
-            self.print_colored("✅ Frontend server stopped", Colors.GREEN)
-            
-        # Kill any remaining processes
-        try:
-            subprocess.run(["pkill", "-f", "uvicorn.*api_server:app"], capture_output=True)
-            subprocess.run(["pkill", "-f", "ng serve"], capture_output=True)
-        except:
-            pass
+        # Without psutil, fall back to killing leftover servers by name
+        if not PSUTIL_AVAILABLE:
+            try:
+                subprocess.run(["pkill", "-f", "uvicorn.*api_server:app"], capture_output=True)
+                subprocess.run(["pkill", "-f", "ng serve"], capture_output=True)
+            except:
+                pass
             
         self.print_colored("🎉 All services stopped successfully", Colors.GREEN)
         sys.exit(0)
@@ -93,29 +170,27 @@ class ChatbotLauncher:
             self.print_colored("❌ Backend directory 'legal-document-review' not found", Colors.RED)
             return False
             
-        # Change to backend directory
-        os.chdir(backend_dir)
-        
         # Check if virtual environment exists
         venv_dir = backend_dir / "venv"
         if not venv_dir.exists():
             self.print_colored("📦 Creating Python virtual environment...", Colors.YELLOW)
-            subprocess.run([sys.executable, "-m", "venv", "venv"])
+            venv.EnvBuilder(with_pip=True, symlinks=True).create(venv_dir)
             
-        # Install dependencies
-        pip_path = venv_dir / "bin" / "pip"
-        subprocess.run([str(pip_path), "install", "-q", "-r", "requirements.txt"])
+        # Install dependencies, skipped when requirements.txt is unchanged since the last install
+        requirements_hash = hashlib.blake2b((backend_dir / "requirements.txt").read_bytes()).hexdigest()
+        hash_file = venv_dir / ".reqs_hash"
+        if hash_file.exists() and hash_file.read_text() == requirements_hash:
+            self.print_colored("✅ Python dependencies up to date", Colors.GREEN)
+        else:
+            pip_path = venv_dir / "bin" / "pip"
+            result = subprocess.run([str(pip_path), "install", "-q", "-r", "requirements.txt"], cwd=str(backend_dir))
+            if result.returncode == 0:
+                hash_file.write_text(requirements_hash)
         
         # Start the backend API
         self.print_colored("🚀 Launching FastAPI server...", Colors.BLUE)
         python_path = venv_dir / "bin" / "python"
-        self.backend_process = subprocess.Popen([str(python_path), "api_server.py"])
-        
-        # Wait for backend to start
-        if not self.wait_for_service(8000, "Backend API"):
-            self.print_colored("❌ Failed to start backend API", Colors.RED)
-            return False
-            
+        self.backend_process = subprocess.Popen([str(python_path), "api_server.py"], cwd=str(backend_dir))
         return True
         
     def start_frontend(self):
@@ -127,14 +202,11 @@ class ChatbotLauncher:
             self.print_colored("❌ Frontend directory 'legal-chatbot' not found", Colors.RED)
             return False
             
-        # Change to frontend directory
-        os.chdir(frontend_dir)
-        
         # Install dependencies if needed
         node_modules = frontend_dir / "node_modules"
         if not node_modules.exists():
             self.print_colored("📦 Installing Node.js dependencies...", Colors.YELLOW)
-            subprocess.run(["npm", "install"])
+            subprocess.run(["npm", "install"], cwd=str(frontend_dir))
             
         # Start the Angular development server
         self.print_colored("🚀 Launching Angular development server...", Colors.BLUE)
@@ -148,26 +220,57 @@ class ChatbotLauncher:
                 stderr=subprocess.PIPE,
                 cwd=str(frontend_dir)
             )
+            for stream, buffer in ((self.frontend_process.stdout, self.frontend_stdout),
+                                   (self.frontend_process.stderr, self.frontend_stderr)):
+                threading.Thread(target=self._pump, args=(stream, buffer), daemon=True).start()
             self.print_colored("📝 Angular server starting in background...", Colors.YELLOW)
             self.print_colored("⏳ First build may take 30-60 seconds, please be patient", Colors.BLUE)
         except Exception as e:
             self.print_colored(f"❌ Failed to start Angular server: {e}", Colors.RED)
             return False
+            
+        return True
+        
+    def report_frontend_failure(self):
+        """Show why the Angular server failed to come up"""
+        # If it failed, check if the process is still running
+        if self.frontend_process and self.frontend_process.poll() is not None:
+            stdout = b"".join(self.frontend_stdout)
+            stderr = b"".join(self.frontend_stderr)
+            self.print_colored("❌ Angular process exited with errors:", Colors.RED)
+            if stderr:
+                self.print_colored(f"Error: {stderr.decode(errors='replace')}", Colors.RED)
+            if stdout:
+                self.print_colored(f"Output: {stdout.decode(errors='replace')}", Colors.YELLOW)
+        self.print_colored("❌ Failed to start frontend server", Colors.RED)
         
-        # Wait for frontend to start
-        if not self.wait_for_service(4200, "Frontend Server"):
-            # If it failed, check if the process is still running
-            if self.frontend_process and self.frontend_process.poll() is not None:
-                stdout, stderr = self.frontend_process.communicate()
-                self.print_colored("❌ Angular process exited with errors:", Colors.RED)
-                if stderr:
-                    self.print_colored(f"Error: {stderr.decode()}", Colors.RED)
-                if stdout:
-                    self.print_colored(f"Output: {stdout.decode()}", Colors.YELLOW)
-            self.print_colored("❌ Failed to start frontend server", Colors.RED)
+    async def start_services(self):
+        """Launch both services in parallel, then wait for them to come up concurrently"""
+        # Every subprocess gets an explicit cwd, so the two setups can run side by side
+        backend_started, frontend_started = await asyncio.gather(
+            asyncio.to_thread(self.start_backend),
+            asyncio.to_thread(self.start_frontend)
+        )
+        if not (backend_started and frontend_started):
             return False
+        
+        # The loop's SIGCHLD handler (a wakeup fd under the hood) wakes the readiness checks
+        self.child_exited = asyncio.Event()
+        if hasattr(signal, "SIGCHLD"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGCHLD, self.child_exited.set)
+        
+        # Overlap the Angular build with backend startup
+        backend_ready, frontend_ready = await asyncio.gather(
+            self.wait_for_service(8000, "Backend API"),
+            self.wait_for_service(4200, "Frontend Server")
+        )
+        
+        if not backend_ready:
+            self.print_colored("❌ Failed to start backend API", Colors.RED)
+        if not frontend_ready:
+            self.report_frontend_failure()
             
-        return True
+        return backend_ready and frontend_ready
         
     def run(self):
         """Main execution function"""
@@ -178,12 +281,8 @@ class ChatbotLauncher:
         self.print_colored("🚀 Starting Legal Document Chatbot...", Colors.GREEN)
         self.print_colored("==================================", Colors.GREEN)
         
-        # Start backend
-        if not self.start_backend():
-            sys.exit(1)
-            
-        # Start frontend  
-        if not self.start_frontend():
+        # Start backend and frontend
+        if not asyncio.run(self.start_services()):
             sys.exit(1)
             
         # Success message
@@ -4,14 +4,24 @@ Legal Document Review API with Compliance Guardrails
 FastAPI-based REST API for the legal document RAG system with integrated compliance.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status, Query
+from fastapi import FastAPI, HTTPException, Depends, status, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uvicorn
+import orjson
+import msgspec
+import asyncio
+import hashlib
 import logging
+import time
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -31,7 +41,8 @@ app = FastAPI(
     description="AI-powered legal document search with compliance guardrails",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse  # orjson encodes straight to bytes, datetimes included
 )
 
 # Security
@@ -46,9 +57,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def cache_control_for(path: str) -> Optional[str]:
+    """Cache-Control policy for GET endpoints that clients poll; these also get ETags."""
+    if path == "/categories" or path.startswith("/documents/category/"):
+        return "max-age=60, stale-while-revalidate=300"
+    return None
+
+def content_etag(body: bytes) -> str:
+    """Weak ETag from a hash of the uncompressed body (GZip may re-encode it afterwards)."""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+class ETagMiddleware:
+    """
+    Tag pollable GET responses and answer a matching If-None-Match with 304 Not Modified.
+    
+    Plain ASGI middleware: every request without a Cache-Control policy (all POSTs
+    included) is handed straight to the app without wrapping its response.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        cache_control = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            cache_control = cache_control_for(scope["path"])
+        if cache_control is None:
+            await self.app(scope, receive, send)
+            return
+        
+        # Bodies of these endpoints are small JSON documents; buffer them to hash
+        messages: List[Message] = []
+        
+        async def buffer(message: Message):
+            messages.append(message)
+        
+        await self.app(scope, receive, buffer)
+        
+        start, *body_messages = messages
+        if start["status"] != 200:
+            for message in messages:
+                await send(message)
+            return
+        
+        body = b"".join(message.get("body", b"") for message in body_messages)
+        headers = MutableHeaders(raw=start["headers"])
+        etag = headers.get("etag") or content_etag(body)
+        headers["etag"] = etag
+        headers["cache-control"] = cache_control
+        
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match:
+            # Weak comparison: W/"x" and "x" match each other
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or etag.removeprefix("W/") in tags:
+                for name in ("content-length", "content-type", "content-encoding"):
+                    if name in headers:
+                        del headers[name]
+                start["status"] = 304
+                body = b""
+        
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+# Registered between CORS and GZip, so it hashes uncompressed bodies and 304s keep CORS headers
+app.add_middleware(ETagMiddleware)
+
+# Compress larger JSON bodies (search results, document listings, audit log) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Global RAG system instance
 rag_system: Optional[LegalDocumentRAG] = None
 
+# /search batching: up to SEARCH_MAX_BATCH requests arriving within SEARCH_MAX_WAIT_MS share one RAG pass
+SEARCH_MAX_BATCH = int(os.getenv("SEARCH_MAX_BATCH", 32))
+SEARCH_MAX_WAIT_MS = float(os.getenv("SEARCH_MAX_WAIT_MS", 5))
+
 # Pydantic models for API
 class SearchRequest(BaseModel):
     query: str = Field(..., min_length=3, max_length=500, description="Search query")
@@ -65,6 +149,16 @@ class DocumentValidationRequest(BaseModel):
     contains_pii: bool = Field(default=False, description="Contains PII")
     contains_privileged: bool = Field(default=False, description="Contains privileged information")
 
+class DocumentValidationStruct(msgspec.Struct):
+    """msgspec mirror of DocumentValidationRequest, decoded and type-checked in one pass."""
+    title: str
+    content: str
+    category: str
+    jurisdiction: str
+    confidentiality_level: str = "public"
+    contains_pii: bool = False
+    contains_privileged: bool = False
+
 class SearchResponse(BaseModel):
     success: bool
     results: List[Dict[str, Any]]
@@ -100,14 +194,115 @@ def get_user_context(
         "access_level": access_level
     }
 
+class SearchBatcher:
+    """Coalesces concurrent /search calls into one search_documents_many call on the RAG system."""
+    
+    def __init__(self, rag: LegalDocumentRAG, max_batch: int = SEARCH_MAX_BATCH, max_wait_ms: float = SEARCH_MAX_WAIT_MS):
+        self.rag = rag
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+    
+    async def search(self, query: str, top_k: int, user_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one search and wait for its share of the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(((query, top_k, user_context), future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            
+            # Gather whatever else arrives within the batching window
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            searches = [search for search, _ in batch]
+            try:
+                results = await self.rag.async_search_documents_many(searches)
+            except Exception as e:
+                results = [e] * len(batch)
+            
+            # Scatter results back; a waiter may have gone away (client disconnected)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+search_batcher: Optional[SearchBatcher] = None
+
+class ResponseCache:
+    """Short-lived cache of fully encoded JSON bodies for slow-changing GET endpoints."""
+    
+    def __init__(self, ttl: float = float(os.getenv("RESPONSE_CACHE_TTL", 60)), max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: Dict[str, Tuple[float, bytes, str]] = {}
+    
+    def get(self, key: str) -> Optional[Response]:
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return Response(content=entry[1], media_type="application/json", headers={"ETag": entry[2]})
+        return None
+    
+    def put(self, key: str, content: Any) -> Response:
+        """Encode content once, remember the bytes and their ETag, and return them as a response."""
+        if key not in self.entries and len(self.entries) >= self.max_entries:
+            self.entries.pop(next(iter(self.entries)))  # Evict the oldest entry
+        body = orjson.dumps(jsonable_encoder(content), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        etag = content_etag(body)
+        self.entries[key] = (time.monotonic() + self.ttl, body, etag)
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    
+    def invalidate(self, key: str):
+        self.entries.pop(key, None)
+
+response_cache = ResponseCache()
+
+# (epoch second, ISO string) for the timestamps stamped on responses
+_timestamp_cache = (0, "")
+
+def response_timestamp() -> str:
+    """Current local time as an ISO string, formatted at most once per second."""
+    global _timestamp_cache
+    second = int(time.time())
+    if second != _timestamp_cache[0]:
+        _timestamp_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _timestamp_cache[1]
+
 # Initialize RAG system
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG system on startup."""
-    global rag_system
+    global rag_system, search_batcher
     try:
         compliance_level = ComplianceLevel(os.getenv("COMPLIANCE_LEVEL", "standard"))
         rag_system = LegalDocumentRAG(compliance_level)
+        search_batcher = SearchBatcher(rag_system)
+        search_batcher.start()
         logger.info("Legal Document RAG API initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize RAG system: {str(e)}")
@@ -117,14 +312,19 @@ async def startup_event():
 async def shutdown_event():
     """Clean up resources on shutdown."""
     global rag_system
+    if search_batcher:
+        await search_batcher.stop()
     if rag_system:
         rag_system.close()
         logger.info("RAG system shut down successfully")
 
 # API Routes
 
+# Routes below keep response_model= for the OpenAPI schema but return an ORJSONResponse
+# built from a plain dict, which FastAPI sends as-is instead of re-validating the model.
+
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check() -> ORJSONResponse:
     """Health check endpoint with compliance status."""
     try:
         if not rag_system:
@@ -132,13 +332,13 @@ async def health_check():
         
         summary = rag_system.get_compliance_summary()
         
-        return HealthResponse(
-            status="healthy",
-            timestamp=datetime.now().isoformat(),
-            compliance_level=summary["compliance_level"],
-            guardrails_available=summary["guardrails_available"],
-            database_connected=True  # Would check actual DB connection in production
-        )
+        return ORJSONResponse({
+            "status": "healthy",
+            "timestamp": response_timestamp(),
+            "compliance_level": summary["compliance_level"],
+            "guardrails_available": summary["guardrails_available"],
+            "database_connected": True  # Would check actual DB connection in production
+        })
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
@@ -147,7 +347,7 @@ async def health_check():
 async def search_documents(
     request: SearchRequest,
     user_context: Dict[str, str] = Depends(get_user_context)
-):
+) -> ORJSONResponse:
     """Search legal documents with compliance validation."""
     try:
         if not rag_system:
@@ -159,76 +359,57 @@ async def search_documents(
             "access_level": request.access_level
         }
         
-        # Perform search with compliance checks
-        search_result = rag_system.search_documents(
-            query=request.query,
-            top_k=request.max_results,
-            user_context=search_context
-        )
+        # Perform search with compliance checks, batched with concurrent requests
+        search_result = await search_batcher.search(request.query, request.max_results, search_context)
+        
+        # The search was audit-logged, so the cached compliance summary is stale
+        response_cache.invalidate("compliance_summary")
         
         # Convert compliance report to dict for JSON serialization
-        compliance_dict = {}
-        if search_result.get('compliance_report'):
-            report = search_result['compliance_report']
-            compliance_dict = {
-                'is_compliant': report.is_compliant,
-                'compliance_score': report.compliance_score,
-                'violations': [
-                    {
-                        'type': v.violation_type,
-                        'severity': v.severity,
-                        'message': v.message,
-                        'field': v.field,
-                        'suggested_fix': v.suggested_fix
-                    } for v in report.violations
-                ],
-                'warnings': report.warnings,
-                'recommendations': report.recommendations,
-                'timestamp': report.timestamp.isoformat()
-            }
+        report = search_result.get('compliance_report')
+        compliance_dict = report.to_dict() if report else {}
         
-        return SearchResponse(
-            success=True,
-            results=search_result.get('results', []),
-            compliance_report=compliance_dict,
-            search_allowed=search_result.get('search_allowed', False),
-            total_results=search_result.get('total_results', 0),
-            search_duration_seconds=search_result.get('search_duration_seconds', 0.0),
-            message=search_result.get('message', 'Search completed')
-        )
+        return ORJSONResponse({
+            'success': True,
+            'results': search_result.get('results', []),
+            'compliance_report': compliance_dict,
+            'search_allowed': search_result.get('search_allowed', False),
+            'total_results': search_result.get('total_results', 0),
+            'search_duration_seconds': search_result.get('search_duration_seconds', 0.0),
+            'message': search_result.get('message', 'Search completed')
+        })
         
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-@app.post("/validate-document", response_model=ComplianceResponse)
-async def validate_document(request: DocumentValidationRequest):
+# The body is decoded with msgspec rather than FastAPI's pydantic pass (documents can be
+# large); the pydantic model still documents the request body in the OpenAPI schema.
+@app.post(
+    "/validate-document",
+    response_model=ComplianceResponse,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": DocumentValidationRequest.model_json_schema()}}
+    }}
+)
+async def validate_document(request: Request) -> ORJSONResponse:
     """Validate a document for compliance before storage."""
+    try:
+        document = msgspec.json.decode(await request.body(), type=DocumentValidationStruct, strict=False)
+    except msgspec.MsgspecError as e:
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+    
     try:
         if not rag_system:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
-        document_dict = request.dict()
+        document_dict = msgspec.to_builtins(document)
         
         # Validate document compliance
-        compliance_report = rag_system.validate_document_for_storage(document_dict)
+        compliance_report = await rag_system.async_validate_document_for_storage(document_dict)
         
-        return ComplianceResponse(
-            is_compliant=compliance_report.is_compliant,
-            violations=[
-                {
-                    'type': v.violation_type,
-                    'severity': v.severity,
-                    'message': v.message,
-                    'field': v.field,
-                    'suggested_fix': v.suggested_fix
-                } for v in compliance_report.violations
-            ],
-            warnings=compliance_report.warnings,
-            recommendations=compliance_report.recommendations,
-            compliance_score=compliance_report.compliance_score,
-            timestamp=compliance_report.timestamp.isoformat()
-        )
+        return ORJSONResponse(compliance_report.to_dict())
         
     except Exception as e:
         logger.error(f"Document validation failed: {str(e)}")
@@ -241,11 +422,15 @@ async def get_categories():
         if not rag_system:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
-        categories = rag_system.list_categories()
-        return {
+        cached = response_cache.get("categories")
+        if cached:
+            return cached
+        
+        categories = await rag_system.async_list_categories()
+        return response_cache.put("categories", {
             "categories": categories,
             "total": len(categories)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get categories: {str(e)}")
@@ -258,12 +443,16 @@ async def get_documents_by_category(category: str):
         if not rag_system:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
-        documents = rag_system.get_documents_by_category(category)
-        return {
+        cached = response_cache.get(f"category:{category}")
+        if cached:
+            return cached
+        
+        documents = await rag_system.async_get_documents_by_category(category)
+        return response_cache.put(f"category:{category}", {
             "category": category,
             "documents": documents,
             "total": len(documents)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Failed to get documents for category {category}: {str(e)}")
@@ -276,8 +465,12 @@ async def get_compliance_summary():
         if not rag_system:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
+        cached = response_cache.get("compliance_summary")
+        if cached:
+            return cached
+        
         summary = rag_system.get_compliance_summary()
-        return summary
+        return response_cache.put("compliance_summary", summary)
         
     except Exception as e:
         logger.error(f"Failed to get compliance summary: {str(e)}")
@@ -290,14 +483,11 @@ async def get_audit_log(limit: int = Query(50, ge=1, le=1000)):
         if not rag_system:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
-        # In a production system, this would come from a persistent audit log
-        audit_entries = rag_system.audit_log[-limit:] if hasattr(rag_system, 'audit_log') else []
-        
-        return {
-            "audit_entries": audit_entries,
-            "total_shown": len(audit_entries),
-            "limit": limit
-        }
+        # In a production system, this would come from a persistent audit log.
+        # Entries are encoded when logged, so the body is assembled from bytes.
+        audit_entries = rag_system.recent_audit_entries_json(limit)
+        body = b'{"audit_entries":[%b],"total_shown":%d,"limit":%d}' % (b",".join(audit_entries), len(audit_entries), limit)
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Failed to get audit log: {str(e)}")
@@ -307,13 +497,13 @@ async def get_audit_log(limit: int = Query(50, ge=1, le=1000)):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,
             "message": exc.detail,
             "status_code": exc.status_code,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": response_timestamp()
         }
     )
 
@@ -321,13 +511,13 @@ async def http_exception_handler(request, exc):
 async def general_exception_handler(request, exc):
     """General exception handler."""
     logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": True,
             "message": "Internal server error",
             "status_code": 500,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": response_timestamp()
         }
     )
 
@@ -336,12 +526,22 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
-    logger.info(f"Starting Legal Document Review API on {host}:{port}")
+    # Auto-reload (single process) only in development. One worker unless WEB_CONCURRENCY
+    # is set: the audit log, caches and corpus snapshot live in each worker's memory.
+    dev_mode = os.getenv("ENV") == "dev"
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    
+    logger.info(f"Starting Legal Document Review API on {host}:{port}"
+                f" ({'dev reload' if dev_mode else f'{workers} workers'})")
     
+    # uvloop event loop and httptools parser (uvicorn[standard]) rather than asyncio + h11
     uvicorn.run(
         "api_server:app",
         host=host,
         port=port,
-        reload=True,
+        reload=dev_mode,
+        workers=None if dev_mode else workers,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
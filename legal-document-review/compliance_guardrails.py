@@ -8,7 +8,7 @@ from typing import Dict, List, Any, Optional, Union
 import logging
 import re
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import json
 
@@ -39,6 +39,33 @@ import validators
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Compliance score weight per violation severity (unknown severities count 0.5)
+SEVERITY_WEIGHTS = {
+    'LOW': 0.1,
+    'MEDIUM': 0.3,
+    'HIGH': 0.6,
+    'CRITICAL': 1.0
+}
+
+# Content patterns, compiled once at import
+PROHIBITED_QUERY_PATTERNS = [
+    re.compile(r'\b(hack|crack|illegal|fraud)\b', re.IGNORECASE),
+    re.compile(r'\b(ssn|social\s+security)\b', re.IGNORECASE),
+    re.compile(r'\b(\d{3}-\d{2}-\d{4})\b', re.IGNORECASE),  # SSN pattern
+]
+
+PII_PATTERNS = {
+    'SSN': re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),
+    'Credit Card': re.compile(r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b'),
+    'Phone': re.compile(r'\b\d{3}-\d{3}-\d{4}\b'),
+    'Email': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+}
+
+HARMFUL_QUERY_PATTERNS = [
+    re.compile(r'\b(how to break|illegal|fraud|scam)\b', re.IGNORECASE),
+    re.compile(r'\b(evade|avoid paying|cheat)\b', re.IGNORECASE)
+]
+
 class ComplianceLevel(Enum):
     """Legal compliance levels."""
     BASIC = "basic"
@@ -59,7 +86,7 @@ class LegalDomain(Enum):
     INTELLECTUAL_PROPERTY = "intellectual_property"
     CORPORATE_LAW = "corporate_law"
 
-@dataclass
+@dataclass(slots=True)
 class ComplianceViolation:
     """Represents a compliance violation."""
     violation_type: str
@@ -72,8 +99,18 @@ class ComplianceViolation:
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.now()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the violation for API responses."""
+        return {
+            'type': self.violation_type,
+            'severity': self.severity,
+            'message': self.message,
+            'field': self.field,
+            'suggested_fix': self.suggested_fix
+        }
 
-@dataclass
+@dataclass(slots=True)
 class ComplianceReport:
     """Comprehensive compliance report."""
     is_compliant: bool
@@ -82,10 +119,24 @@ class ComplianceReport:
     recommendations: List[str]
     compliance_score: float  # 0.0 to 1.0
     timestamp: datetime
+    _serialized: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.now()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the report for API responses; built once per report, treat as read-only."""
+        if self._serialized is None:
+            self._serialized = {
+                'is_compliant': self.is_compliant,
+                'compliance_score': self.compliance_score,
+                'violations': [v.to_dict() for v in self.violations],
+                'warnings': self.warnings,
+                'recommendations': self.recommendations,
+                'timestamp': self.timestamp.isoformat()
+            }
+        return self._serialized
 
 class LegalDocumentModel(BaseModel):
     """Pydantic model for legal document validation."""
@@ -132,15 +183,9 @@ class LegalQueryModel(BaseModel):
     @classmethod
     def validate_query(cls, v):
         # Basic content filtering
-        prohibited_patterns = [
-            r'\b(hack|crack|illegal|fraud)\b',
-            r'\b(ssn|social\s+security)\b',
-            r'\b(\d{3}-\d{2}-\d{4})\b',  # SSN pattern
-        ]
-        
-        for pattern in prohibited_patterns:
-            if re.search(pattern, v, re.IGNORECASE):
-                raise ValueError(f"Query contains prohibited content: {pattern}")
+        for pattern in PROHIBITED_QUERY_PATTERNS:
+            if pattern.search(v):
+                raise ValueError(f"Query contains prohibited content: {pattern.pattern}")
         
         return v.strip()
 
@@ -351,16 +396,11 @@ class LegalComplianceGuardrails:
         violations = []
         content = document.get('content', '') + ' ' + document.get('title', '')
         
-        # PII patterns
-        pii_patterns = {
-            'SSN': r'\b\d{3}-\d{2}-\d{4}\b',
-            'Credit Card': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
-            'Phone': r'\b\d{3}-\d{3}-\d{4}\b',
-            'Email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        }
-        
-        for pii_type, pattern in pii_patterns.items():
-            if re.search(pattern, content):
+        for pii_type, pattern in PII_PATTERNS.items():
+            # An email address needs an '@'; skip the costly character-class scan otherwise
+            if pii_type == 'Email' and '@' not in content:
+                continue
+            if pattern.search(content):
                 violations.append(ComplianceViolation(
                     violation_type="PII_DETECTED",
                     severity="HIGH",
@@ -433,13 +473,8 @@ class LegalComplianceGuardrails:
         violations = []
         
         # Check for potentially harmful queries
-        harmful_patterns = [
-            r'\b(how to break|illegal|fraud|scam)\b',
-            r'\b(evade|avoid paying|cheat)\b'
-        ]
-        
-        for pattern in harmful_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
+        for pattern in HARMFUL_QUERY_PATTERNS:
+            if pattern.search(query):
                 violations.append(ComplianceViolation(
                     violation_type="INAPPROPRIATE_QUERY",
                     severity="HIGH",
@@ -513,14 +548,7 @@ class LegalComplianceGuardrails:
             return 1.0
         
         # Weight violations by severity
-        severity_weights = {
-            'LOW': 0.1,
-            'MEDIUM': 0.3,
-            'HIGH': 0.6,
-            'CRITICAL': 1.0
-        }
-        
-        total_weight = sum(severity_weights.get(v.severity, 0.5) for v in violations)
+        total_weight = sum(SEVERITY_WEIGHTS.get(v.severity, 0.5) for v in violations)
         max_possible = len(violations)  # Assuming all could be CRITICAL
         
         score = max(0.0, 1.0 - (total_weight / max(max_possible, 1)))
@@ -8,10 +8,16 @@ with integrated compliance monitoring and AI safety guardrails.
 from sklearn.feature_extraction.text import TfidfVectorizer
 from pymongo import MongoClient
 import numpy as np
+import orjson
+import asyncio
 import os
+import threading
+import time
+from collections import deque
+from itertools import islice
 import logging
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # Import compliance guardrails
@@ -28,6 +34,12 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Search audit entries kept in memory (oldest dropped first)
+AUDIT_LOG_MAX_ENTRIES = 10_000
+
+# Seconds a snapshot of the document collection is reused by searches before re-reading MongoDB
+CORPUS_TTL_SECONDS = float(os.getenv("CORPUS_TTL_SECONDS", 300))
+
 class LegalDocumentRAG:
     """A comprehensive RAG system for legal document search and retrieval with compliance guardrails."""
     
@@ -37,7 +49,14 @@ class LegalDocumentRAG:
         self.collection = None
         self.vectorizer_collection = None
         self.compliance = LegalComplianceGuardrails(compliance_level)
-        self.audit_log = []
+        self.audit_log = deque(maxlen=AUDIT_LOG_MAX_ENTRIES)
+        self.audit_log_json = deque(maxlen=AUDIT_LOG_MAX_ENTRIES)  # Same entries, JSON-encoded once
+        # Searches append from worker threads; deques cannot be iterated while they grow
+        self._audit_lock = threading.Lock()
+        self.total_searches = 0  # Lifetime count; the audit deques keep only the latest entries
+        self._corpus = None
+        self._corpus_loaded_at = 0.0
+        self._corpus_lock = threading.Lock()
         self._initialize()
     
     def _initialize(self):
@@ -97,108 +116,164 @@ class LegalDocumentRAG:
         Returns:
             Dict containing search results and compliance information
         """
-        search_start = datetime.now()
+        return self.search_documents_many([(query, top_k, user_context)])[0]
+    
+    def search_documents_many(self, searches: List[Tuple[str, int, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """
+        Run several compliant searches at once, sharing one document fetch and one
+        vectorized similarity pass between them.
         
-        try:
-            # Validate query compliance
-            query_compliance = self.compliance.validate_query(query, user_context)
+        Args:
+            searches: (query, top_k, user_context) tuples
             
-            if not query_compliance.is_compliant:
-                logger.warning(f"Query failed compliance check: {query}")
-                return {
-                    'results': [],
+        Returns:
+            One search_documents result dict per search, in order
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(searches)
+        allowed = []
+        
+        for index, (query, top_k, user_context) in enumerate(searches):
+            search_start = datetime.now()
+            try:
+                # Validate query compliance
+                query_compliance = self.compliance.validate_query(query, user_context)
+                
+                if not query_compliance.is_compliant:
+                    logger.warning(f"Query failed compliance check: {query}")
+                    responses[index] = {
+                        'results': [],
+                        'compliance_report': query_compliance,
+                        'search_allowed': False,
+                        'message': 'Query failed compliance validation'
+                    }
+                    continue
+                
+                # Log compliance warnings if any
+                if query_compliance.warnings:
+                    for warning in query_compliance.warnings:
+                        logger.warning(f"Query compliance warning: {warning}")
+                
+                allowed.append((index, search_start, query_compliance))
+            except Exception as e:
+                responses[index] = self._search_failure(e)
+        
+        # Perform the searches together
+        raw_results = self._perform_search_many([(searches[index][0], searches[index][1]) for index, _, _ in allowed])
+        
+        for (index, search_start, query_compliance), results in zip(allowed, raw_results):
+            query, _, user_context = searches[index]
+            try:
+                # Filter results based on user access level
+                filtered_results = self._filter_results_by_access(results, user_context)
+                
+                # Add compliance disclaimers
+                processed_results = self._add_compliance_disclaimers(filtered_results)
+                
+                # Log the search for audit purposes
+                self._log_search_audit(query, len(processed_results), user_context, query_compliance)
+                
+                search_duration = (datetime.now() - search_start).total_seconds()
+                
+                responses[index] = {
+                    'results': processed_results,
                     'compliance_report': query_compliance,
-                    'search_allowed': False,
-                    'message': 'Query failed compliance validation'
+                    'search_allowed': True,
+                    'search_duration_seconds': search_duration,
+                    'total_results': len(processed_results),
+                    'message': 'Search completed successfully'
                 }
-            
-            # Log compliance warnings if any
-            if query_compliance.warnings:
-                for warning in query_compliance.warnings:
-                    logger.warning(f"Query compliance warning: {warning}")
-            
-            # Perform the search
-            raw_results = self._perform_search(query, top_k)
-            
-            # Filter results based on user access level
-            filtered_results = self._filter_results_by_access(raw_results, user_context)
-            
-            # Add compliance disclaimers
-            processed_results = self._add_compliance_disclaimers(filtered_results)
-            
-            # Log the search for audit purposes
-            self._log_search_audit(query, len(processed_results), user_context, query_compliance)
-            
-            search_duration = (datetime.now() - search_start).total_seconds()
-            
-            return {
-                'results': processed_results,
-                'compliance_report': query_compliance,
-                'search_allowed': True,
-                'search_duration_seconds': search_duration,
-                'total_results': len(processed_results),
-                'message': 'Search completed successfully'
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in compliant search: {str(e)}")
-            return {
-                'results': [],
-                'compliance_report': None,
-                'search_allowed': False,
-                'message': f'Search failed: {str(e)}'
-            }
+            except Exception as e:
+                responses[index] = self._search_failure(e)
+        
+        return responses
+    
+    def _search_failure(self, error: Exception) -> Dict[str, Any]:
+        """Result dict for a search that raised."""
+        logger.error(f"Error in compliant search: {str(error)}")
+        return {
+            'results': [],
+            'compliance_report': None,
+            'search_allowed': False,
+            'message': f'Search failed: {str(error)}'
+        }
     
     def _perform_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
         """
         Perform the actual document search (existing logic).
         """
+        return self._perform_search_many([(query, top_k)])[0]
+    
+    def _load_corpus(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Snapshot of the document collection: all documents, those with embeddings, their
+        stacked embedding matrix and its row norms. Re-read at most every CORPUS_TTL_SECONDS.
+        """
+        with self._corpus_lock:
+            if self._corpus is None or time.monotonic() - self._corpus_loaded_at > CORPUS_TTL_SECONDS:
+                all_docs = list(self.collection.find({}))
+                embedded_docs = [doc for doc in all_docs if 'embedding' in doc]
+                doc_embeddings = doc_norms = None
+                if embedded_docs:
+                    doc_embeddings = np.array([doc['embedding'] for doc in embedded_docs], dtype=float)
+                    doc_norms = np.linalg.norm(doc_embeddings, axis=1)
+                    # The matrix now holds the vectors; drop the per-document float lists
+                    for doc in embedded_docs:
+                        del doc['embedding']
+                self._corpus = (all_docs, embedded_docs, doc_embeddings, doc_norms)
+                self._corpus_loaded_at = time.monotonic()
+            return self._corpus
+    
+    def _perform_search_many(self, searches: List[Tuple[str, int]]) -> List[List[Dict[str, Any]]]:
+        """
+        Rank documents for several (query, top_k) searches with one TF-IDF transform
+        and one query x document cosine-similarity matrix over the corpus snapshot.
+        """
+        if not searches:
+            return []
+        
+        all_docs = None
         try:
+            # Documents and their embedding matrix come from the in-memory snapshot
+            all_docs, embedded_docs, doc_embeddings, doc_norms = self._load_corpus()
+            
             # If no vectorizer is loaded, fall back to simple text search
             if not self.vectorizer:
-                return self._simple_text_search(query, top_k)
+                return [self._simple_text_search(query, top_k, all_docs) for query, top_k in searches]
             
-            # Generate query embedding using TF-IDF
-            query_embedding = self.vectorizer.transform([query]).toarray()[0]
+            # Generate query embeddings using TF-IDF
+            query_embeddings = self.vectorizer.transform([query for query, _ in searches]).toarray()
             
-            # Retrieve all documents
-            all_docs = list(self.collection.find({}))
+            if not embedded_docs:
+                return [[] for _ in searches]
             
-            # Calculate similarities
-            results = []
-            for doc in all_docs:
-                if 'embedding' in doc:
-                    # Calculate cosine similarity
-                    doc_embedding = np.array(doc['embedding'])
-                    
-                    # Normalize vectors for cosine similarity
-                    query_norm = np.linalg.norm(query_embedding)
-                    doc_norm = np.linalg.norm(doc_embedding)
-                    
-                    if query_norm > 0 and doc_norm > 0:
-                        similarity = np.dot(query_embedding, doc_embedding) / (query_norm * doc_norm)
-                    else:
-                        similarity = 0.0
-                    
+            # Cosine similarity, 0.0 wherever either vector has zero norm
+            norms = np.outer(np.linalg.norm(query_embeddings, axis=1), doc_norms)
+            dots = query_embeddings @ doc_embeddings.T
+            similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+            
+            batch_results = []
+            for row, (_, top_k) in zip(similarities, searches):
+                # Stable descending order keeps ties in collection order, then take top_k
+                results = []
+                for position in np.argsort(-row, kind='stable')[:top_k]:
+                    doc = embedded_docs[position]
                     results.append({
                         'id': doc['id'],
                         'title': doc.get('title', 'Untitled'),
                         'text': doc['text'],
                         'category': doc.get('category', 'unknown'),
                         'jurisdiction': doc.get('jurisdiction', 'unknown'),
-                        'similarity': float(similarity),
+                        'similarity': float(row[position]),
                         'confidentiality_level': doc.get('confidentiality_level', 'public'),
                         'contains_pii': doc.get('contains_pii', False),
                         'contains_privileged': doc.get('contains_privileged', False)
                     })
-            
-            # Sort by similarity and return top_k
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:top_k]
+                batch_results.append(results)
+            return batch_results
             
         except Exception as e:
             logger.error(f"Error in document search: {str(e)}")
-            return self._simple_text_search(query, top_k)
+            return [self._simple_text_search(query, top_k, all_docs) for query, top_k in searches]
     
     def _filter_results_by_access(self, results: List[Dict[str, Any]], user_context: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter search results based on user access permissions."""
@@ -279,7 +354,11 @@ class LegalDocumentRAG:
             'query_compliant': compliance_report.is_compliant
         }
         
-        self.audit_log.append(audit_entry)
+        audit_json = orjson.dumps(audit_entry)
+        with self._audit_lock:
+            self.total_searches += 1
+            self.audit_log.append(audit_entry)
+            self.audit_log_json.append(audit_json)
         logger.info(f"Search audit: {query[:50]}... | Results: {result_count} | Compliant: {compliance_report.is_compliant}")
     
     def search_documents_legacy(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
@@ -296,12 +375,13 @@ class LegalDocumentRAG:
         logger.warning("Using legacy search method without compliance checks")
         return self._perform_search(query, top_k)
     
-    def _simple_text_search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def _simple_text_search(self, query: str, top_k: int = 3, all_docs: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Fallback simple text search when vectorizer is not available."""
         try:
             # Simple keyword-based search
             query_words = query.lower().split()
-            all_docs = list(self.collection.find({}))
+            if all_docs is None:
+                all_docs = list(self.collection.find({}))
             
             results = []
             for doc in all_docs:
@@ -369,19 +449,48 @@ class LegalDocumentRAG:
     def get_compliance_summary(self) -> Dict[str, Any]:
         """Get comprehensive compliance and audit summary."""
         compliance_summary = self.compliance.get_compliance_summary()
+        with self._audit_lock:
+            total_searches = self.total_searches
+            audit_log = list(self.audit_log)
         
+        # Averages and counts below cover the retained window of the last audit_window_entries searches
         return {
             **compliance_summary,
-            'total_searches': len(self.audit_log),
-            'recent_searches': self.audit_log[-5:] if self.audit_log else [],
-            'average_compliance_score': np.mean([entry['compliance_score'] for entry in self.audit_log]) if self.audit_log else 0.0,
-            'non_compliant_searches': len([entry for entry in self.audit_log if not entry['query_compliant']])
+            'total_searches': total_searches,
+            'recent_searches': audit_log[-5:],
+            'audit_window_entries': len(audit_log),
+            'average_compliance_score': np.mean([entry['compliance_score'] for entry in audit_log]) if audit_log else 0.0,
+            'non_compliant_searches': len([entry for entry in audit_log if not entry['query_compliant']])
         }
     
+    def recent_audit_entries_json(self, limit: int) -> List[bytes]:
+        """The last limit audit entries as pre-encoded JSON, oldest first."""
+        with self._audit_lock:
+            return list(islice(self.audit_log_json, max(len(self.audit_log_json) - limit, 0), None))
+    
     def validate_document_for_storage(self, document: Dict[str, Any]) -> ComplianceReport:
         """Validate a document before storing it in the database."""
         return self.compliance.validate_document(document)
     
+    # Async variants for the API server. pymongo and the TF-IDF scoring are blocking,
+    # so each call runs once in a worker thread instead of stalling the event loop.
+    
+    async def async_search_documents_many(self, searches: List[Tuple[str, int, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Async version of search_documents_many."""
+        return await asyncio.to_thread(self.search_documents_many, searches)
+    
+    async def async_validate_document_for_storage(self, document: Dict[str, Any]) -> ComplianceReport:
+        """Async version of validate_document_for_storage."""
+        return await asyncio.to_thread(self.validate_document_for_storage, document)
+    
+    async def async_list_categories(self) -> List[str]:
+        """Async version of list_categories."""
+        return await asyncio.to_thread(self.list_categories)
+    
+    async def async_get_documents_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Async version of get_documents_by_category."""
+        return await asyncio.to_thread(self.get_documents_by_category, category)
+    
     def close(self):
         """Close the database connection and save audit logs."""
         if self.client: